@@ -12,16 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import contextvars
+import difflib
+import hashlib
+import json
 import logging
-from typing import AsyncGenerator
+import re
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterable, Deque, Dict, Iterable, List, Optional, Set, Union
 from typing_extensions import override
 
-from google.adk.agents import LlmAgent, BaseAgent, LoopAgent, SequentialAgent
+from google.adk.agents import LlmAgent, BaseAgent, LoopAgent, ParallelAgent, SequentialAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.genai import types
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
-from google.adk.events import Event
+from google.adk.events import Event, EventActions
 from pydantic import BaseModel, Field
 
 # --- Constants ---
@@ -34,10 +43,326 @@ GEMINI_2_FLASH = "gemini-2.0-flash"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Log a one-line summary of each event instead of its full JSON dump
+EVENT_LOG_SUMMARY = False
+EVENT_LOG_MAX_CHARS = 200
+
+
+class LazyEventLog:
+    """
+    Log argument that serializes an event only when a handler formats the record,
+    so filtered-out records never pay for the JSON dump.
+    """
+
+    def __init__(self, event: Event, summary: bool = EVENT_LOG_SUMMARY, max_chars: int = EVENT_LOG_MAX_CHARS):
+        self.event = event
+        self.summary = summary
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        if not self.summary:
+            return self.event.model_dump_json(indent=2, exclude_none=True)
+        text = ""
+        if self.event.content and self.event.content.parts:
+            text = "".join(part.text or "" for part in self.event.content.parts)
+        if len(text) > self.max_chars:
+            text = text[:self.max_chars] + f"... ({len(text)} chars)"
+        state_keys = sorted(self.event.actions.state_delta) if self.event.actions else []
+        return f"author={self.event.author} final={self.event.is_final_response()} text={text!r} state_delta={state_keys}"
+
+
+# --- State Dependency Helpers ---
+# Matches {key}, {{key}} and {key?} placeholders in instructions
+STATE_PLACEHOLDER = re.compile(r"{+([^{}]*)}+")
+
+
+def state_keys_read(agent: BaseAgent) -> Optional[Set[str]]:
+    """
+    Returns the state keys an agent reads through its instruction placeholders,
+    or None if they can't be determined (e.g. an instruction provider function).
+    """
+    instruction = getattr(agent, "instruction", None)
+    if not isinstance(instruction, str):
+        return None
+    keys = set()
+    for placeholder in STATE_PLACEHOLDER.findall(instruction):
+        key = placeholder.strip().removesuffix("?")
+        if key and not key.startswith("artifact."):
+            keys.add(key)
+    return keys
+
+
+def are_independent(first: BaseAgent, second: BaseAgent) -> bool:
+    """Two agents are independent if neither reads or overwrites the other's output_key."""
+    first_reads, second_reads = state_keys_read(first), state_keys_read(second)
+    if first_reads is None or second_reads is None:
+        return False
+    first_writes = getattr(first, "output_key", None)
+    second_writes = getattr(second, "output_key", None)
+    return (
+        first_writes not in second_reads
+        and second_writes not in first_reads
+        and (first_writes is None or first_writes != second_writes)
+    )
+
+
+def plan_post_processing(name: str, agents: List[BaseAgent]) -> SequentialAgent:
+    """
+    Groups consecutive, mutually independent agents into ParallelAgent stages
+    and runs the stages in order. Agents that depend on an earlier one start a new stage.
+    """
+    stages: List[List[BaseAgent]] = []
+    for agent in agents:
+        if stages and all(are_independent(agent, other) for other in stages[-1]):
+            stages[-1].append(agent)
+        else:
+            stages.append([agent])
+
+    sub_agents = [
+        stage[0] if len(stage) == 1
+        else ParallelAgent(name=f"{name}Stage{index}", sub_agents=stage)
+        for index, stage in enumerate(stages, start=1)
+    ]
+    return SequentialAgent(name=name, sub_agents=sub_agents)
+
+
+def regeneration_key(agent: BaseAgent, state) -> str:
+    """
+    Memo key of an agent run: its name, instruction template and the state values
+    the instruction reads, as they are rendered into it (a missing optional
+    placeholder or a None value renders as ""). Identical keys mean identical
+    model inputs.
+    """
+    read_keys = state_keys_read(agent) or set()
+    inputs = {key: "" if state.get(key) is None else str(state.get(key)) for key in sorted(read_keys)}
+    material = json.dumps([agent.name, getattr(agent, "instruction", None), inputs], default=str)
+    return hashlib.sha256(material.encode()).hexdigest()[:16]
+
+
+# --- Convergence Check ---
+class ConvergenceCheck(BaseAgent):
+    """
+    First step of each critic/reviser iteration. From the second iteration on, it
+    compares the story with the one the previous iteration started from, and
+    escalates (ending the LoopAgent) once the revision barely changed it.
+    The skipped iterations are reported in an event.
+    """
+
+    # Similarity ratio (0-1) at or above which the story counts as converged
+    threshold: float = 0.95
+    # Iterations of the enclosing loop, to report how many were skipped
+    max_iterations: int
+    story_key: str = "current_story"
+    # State key holding the story snapshot of the current invocation
+    state_key: str = "convergence_check"
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        story = ctx.session.state.get(self.story_key) or ""
+        previous = ctx.session.state.get(self.state_key) or {}
+        # A snapshot from an earlier invocation doesn't count
+        if previous.get("invocation_id") != ctx.invocation_id:
+            previous = {}
+        iteration = previous.get("iteration", 0) + 1
+
+        if previous:
+            similarity = difflib.SequenceMatcher(None, previous["story"], story).ratio()
+            if similarity >= self.threshold:
+                skipped = self.max_iterations - iteration + 1
+                logger.info(
+                    f"[{self.name}] Story converged (similarity {similarity:.3f}), "
+                    f"skipping {skipped} iteration(s)."
+                )
+                yield Event(
+                    invocation_id=ctx.invocation_id,
+                    author=self.name,
+                    branch=ctx.branch,
+                    content=types.Content(role="model", parts=[types.Part(
+                        text=f"Story converged after {iteration - 1} iteration(s) "
+                             f"(similarity {similarity:.3f}); skipped {skipped} iteration(s)."
+                    )]),
+                    actions=EventActions(escalate=True),
+                )
+                return
+
+        # Remember the story this iteration starts from
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.state_key: {
+                "invocation_id": ctx.invocation_id,
+                "iteration": iteration,
+                "story": story,
+            }}),
+        )
+
+
+# --- Stage Timing ---
+class StageSpan(BaseModel):
+    """Timing and usage of one sub-agent run inside an orchestrator."""
+    name: str
+    agent: str
+    invocation_id: str
+    start_time: float  # Unix time, seconds
+    wall_seconds: float = 0.0
+    first_event_seconds: Optional[float] = None
+    event_count: int = 0
+    model_calls: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    error: Optional[str] = None
+
+
+class InProcessSpanCollector:
+    """
+    Aggregates stage spans per stage as they are exported, keeping only the
+    `max_spans` most recent spans, so memory stays bounded in long-running processes.
+    """
+
+    def __init__(self, max_spans: int = 1000):
+        self.spans: Deque[StageSpan] = deque(maxlen=max_spans)
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def export(self, span: StageSpan):
+        self.spans.append(span)
+        stage = self._stages.setdefault(span.name, {
+            "runs": 0, "wall_seconds": 0.0, "first_event_seconds": 0.0,
+            "model_calls": 0, "total_tokens": 0,
+        })
+        stage["runs"] += 1
+        stage["wall_seconds"] += span.wall_seconds
+        stage["first_event_seconds"] += span.first_event_seconds or 0.0
+        stage["model_calls"] += span.model_calls
+        stage["total_tokens"] += span.total_tokens
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: runs, mean wall time and time to first event, model calls and tokens."""
+        stages: Dict[str, Dict[str, float]] = {}
+        for name, totals in self._stages.items():
+            stage = dict(totals)
+            stage["mean_wall_seconds"] = stage.pop("wall_seconds") / stage["runs"]
+            stage["mean_first_event_seconds"] = stage.pop("first_event_seconds") / stage["runs"]
+            stages[name] = stage
+        return stages
+
+    def clear(self):
+        self.spans.clear()
+        self._stages.clear()
+
+
+class OtlpJsonFileExporter:
+    """
+    Appends each span as one OTLP/JSON line (the format of the OpenTelemetry
+    Collector's otlpjsonfile receiver). Spans of one invocation share a trace ID.
+    """
+
+    def __init__(self, path: str, service_name: str = APP_NAME):
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, span: StageSpan):
+        start_ns = int(span.start_time * 1e9)
+        attributes = {
+            "adk.agent": span.agent,
+            "adk.invocation_id": span.invocation_id,
+            "adk.stage.event_count": span.event_count,
+            "adk.stage.model_calls": span.model_calls,
+            "gen_ai.usage.input_tokens": span.prompt_tokens,
+            "gen_ai.usage.output_tokens": span.output_tokens,
+        }
+        if span.first_event_seconds is not None:
+            attributes["adk.stage.first_event_ms"] = int(span.first_event_seconds * 1000)
+        record = {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "storyflow.stages"},
+                "spans": [{
+                    "traceId": hashlib.md5(span.invocation_id.encode()).hexdigest(),
+                    "spanId": uuid.uuid4().hex[:16],
+                    "name": span.name,
+                    "kind": 1,  # SPAN_KIND_INTERNAL
+                    "startTimeUnixNano": str(start_ns),
+                    "endTimeUnixNano": str(start_ns + int(span.wall_seconds * 1e9)),
+                    "attributes": [
+                        {"key": key, "value": {"intValue": str(value)} if isinstance(value, int) else {"stringValue": value}}
+                        for key, value in attributes.items()
+                    ],
+                    # STATUS_CODE_ERROR or STATUS_CODE_OK
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                }],
+            }],
+        }]}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# Default collector for agents without their own span_exporter
+stage_spans = InProcessSpanCollector()
+
+# Extra collector receiving the spans of the current batch (see run_story_batch)
+batch_spans: contextvars.ContextVar[Optional[InProcessSpanCollector]] = contextvars.ContextVar(
+    "batch_spans", default=None
+)
+
+
+class StageTimingMixin:
+    """
+    Mixin for BaseAgent subclasses that orchestrate sub-agents. run_stage() wraps
+    `agent.run_async(ctx)` in a StageSpan (wall time, time to first event, event
+    count, model calls and token usage) and hands it to `self.span_exporter`,
+    or to the module's `stage_spans` collector, and to the `batch_spans`
+    collector of the batch it runs in.
+    """
+
+    async def run_stage(
+        self, ctx: InvocationContext, agent: BaseAgent, name: Optional[str] = None
+    ) -> AsyncGenerator[Event, None]:
+        span = StageSpan(
+            name=name or agent.name,
+            agent=agent.name,
+            invocation_id=ctx.invocation_id,
+            start_time=time.time(),
+        )
+        started = time.perf_counter()
+        try:
+            async for event in agent.run_async(ctx):
+                if span.event_count == 0:
+                    span.first_event_seconds = time.perf_counter() - started
+                span.event_count += 1
+                # Every model response carries its usage metadata
+                usage = event.usage_metadata
+                if usage:
+                    span.model_calls += 1
+                    span.prompt_tokens += usage.prompt_token_count or 0
+                    span.output_tokens += usage.candidates_token_count or 0
+                    span.total_tokens += usage.total_token_count or 0
+                yield event
+        except Exception as e:
+            span.error = repr(e)
+            raise
+        finally:
+            # Includes the time the caller spends handling each event
+            span.wall_seconds = time.perf_counter() - started
+            (getattr(self, "span_exporter", None) or stage_spans).export(span)
+            if batch_spans.get():
+                batch_spans.get().export(span)
+
 
 # --- Custom Orchestrator Agent ---
+# What to do when a negative-tone regeneration would repeat identical inputs
+REGENERATION_REUSE = "reuse"      # reuse the story an identical attempt produced
+REGENERATION_PERTURB = "perturb"  # vary the instruction through regeneration_note
+REGENERATION_CAP = "cap"          # regenerate anyway, up to max_regenerations
+REGENERATION_POLICIES = (REGENERATION_REUSE, REGENERATION_PERTURB, REGENERATION_CAP)
+
 # --8<-- [start:init]
-class StoryFlowAgent(BaseAgent):
+class StoryFlowAgent(StageTimingMixin, BaseAgent):
     """
     Custom agent for a story generation and refinement workflow.
 
@@ -57,6 +382,12 @@ class StoryFlowAgent(BaseAgent):
     loop_agent: LoopAgent
     sequential_agent: SequentialAgent
 
+    # Negative-tone regeneration memo, see REGENERATION_POLICIES
+    regeneration_policy: str = REGENERATION_PERTURB
+    max_regenerations: int = 2
+    # Receives a StageSpan per sub-agent run (see StageTimingMixin)
+    span_exporter: Optional[Any] = None
+
     # model_config allows setting Pydantic configurations if needed, e.g., arbitrary_types_allowed
     model_config = {"arbitrary_types_allowed": True}
 
@@ -68,6 +399,10 @@ class StoryFlowAgent(BaseAgent):
         reviser: LlmAgent,
         grammar_check: LlmAgent,
         tone_check: LlmAgent,
+        convergence_threshold: float = 0.95,
+        regeneration_policy: str = REGENERATION_PERTURB,
+        max_regenerations: int = 2,
+        span_exporter: Optional[Any] = None,
     ):
         """
         Initializes the StoryFlowAgent.
@@ -79,13 +414,29 @@ class StoryFlowAgent(BaseAgent):
             reviser: An LlmAgent to revise the story based on criticism.
             grammar_check: An LlmAgent to check the grammar.
             tone_check: An LlmAgent to analyze the tone.
+            convergence_threshold: Similarity at which revising stops early.
+            regeneration_policy: How repeated negative-tone regenerations are handled.
+            max_regenerations: Regenerations allowed per story inputs (e.g. per topic).
+            span_exporter: Collector for stage timing spans, defaults to stage_spans.
         """
+        if regeneration_policy not in REGENERATION_POLICIES:
+            raise ValueError(f"regeneration_policy must be one of {REGENERATION_POLICIES}")
         # Create internal agents *before* calling super().__init__
+        # The loop ends early once a revision barely changes the story
+        max_iterations = 2
+        convergence_check = ConvergenceCheck(
+            name="ConvergenceCheck",
+            threshold=convergence_threshold,
+            max_iterations=max_iterations,
+        )
         loop_agent = LoopAgent(
-            name="CriticReviserLoop", sub_agents=[critic, reviser], max_iterations=2
+            name="CriticReviserLoop",
+            sub_agents=[convergence_check, critic, reviser],
+            max_iterations=max_iterations,
         )
-        sequential_agent = SequentialAgent(
-            name="PostProcessing", sub_agents=[grammar_check, tone_check]
+        # grammar_check and tone_check only read current_story, so they run concurrently
+        sequential_agent = plan_post_processing(
+            "PostProcessing", [grammar_check, tone_check]
         )
 
         # Define the sub_agents list for the framework
@@ -105,6 +456,9 @@ class StoryFlowAgent(BaseAgent):
             tone_check=tone_check,
             loop_agent=loop_agent,
             sequential_agent=sequential_agent,
+            regeneration_policy=regeneration_policy,
+            max_regenerations=max_regenerations,
+            span_exporter=span_exporter,
             sub_agents=sub_agents_list, # Pass the sub_agents list directly
         )
 # --8<-- [end:init]
@@ -122,8 +476,9 @@ class StoryFlowAgent(BaseAgent):
 
         # 1. Initial Story Generation
         logger.info(f"[{self.name}] Running StoryGenerator...")
-        async for event in self.story_generator.run_async(ctx):
-            logger.info(f"[{self.name}] Event from StoryGenerator: {event.model_dump_json(indent=2, exclude_none=True)}")
+        # Each stage runs inside a timing span (see StageTimingMixin)
+        async for event in self.run_stage(ctx, self.story_generator):
+            logger.info("[%s] Event from StoryGenerator: %s", self.name, LazyEventLog(event))
             yield event
 
         # Check if story was generated before proceeding
@@ -137,17 +492,17 @@ class StoryFlowAgent(BaseAgent):
         # 2. Critic-Reviser Loop
         logger.info(f"[{self.name}] Running CriticReviserLoop...")
         # Use the loop_agent instance attribute assigned during init
-        async for event in self.loop_agent.run_async(ctx):
-            logger.info(f"[{self.name}] Event from CriticReviserLoop: {event.model_dump_json(indent=2, exclude_none=True)}")
+        async for event in self.run_stage(ctx, self.loop_agent):
+            logger.info("[%s] Event from CriticReviserLoop: %s", self.name, LazyEventLog(event))
             yield event
 
         logger.info(f"[{self.name}] Story state after loop: {ctx.session.state.get('current_story')}")
 
-        # 3. Sequential Post-Processing (Grammar and Tone Check)
+        # 3. Post-Processing (Grammar and Tone Check)
         logger.info(f"[{self.name}] Running PostProcessing...")
-        # Use the sequential_agent instance attribute assigned during init
-        async for event in self.sequential_agent.run_async(ctx):
-            logger.info(f"[{self.name}] Event from PostProcessing: {event.model_dump_json(indent=2, exclude_none=True)}")
+        # Independent checks run in parallel; each branch's events stay in order
+        async for event in self.run_stage(ctx, self.sequential_agent):
+            logger.info("[%s] Event from PostProcessing: %s", self.name, LazyEventLog(event))
             yield event
 
         # 4. Tone-Based Conditional Logic
@@ -155,15 +510,62 @@ class StoryFlowAgent(BaseAgent):
         logger.info(f"[{self.name}] Tone check result: {tone_check_result}")
 
         if tone_check_result == "negative":
-            logger.info(f"[{self.name}] Tone is negative. Regenerating story...")
-            async for event in self.story_generator.run_async(ctx):
-                logger.info(f"[{self.name}] Event from StoryGenerator (Regen): {event.model_dump_json(indent=2, exclude_none=True)}")
+            async for event in self._regenerate_story(ctx):
                 yield event
         else:
             logger.info(f"[{self.name}] Tone is not negative. Keeping current story.")
             pass
 
         logger.info(f"[{self.name}] Workflow finished.")
+
+    async def _regenerate_story(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        """
+        Regenerates a negative-tone story, remembering earlier attempts in
+        state["regeneration_attempts"] so identical inputs aren't paid for twice.
+        """
+        state = ctx.session.state
+        attempts = list(state.get("regeneration_attempts", []))
+        # The cap applies per original inputs (e.g. per topic), keyed before any perturbation
+        origin = regeneration_key(self.story_generator, state)
+        tried = [attempt for attempt in attempts if attempt.get("origin") == origin]
+        if len(tried) >= self.max_regenerations:
+            logger.info(f"[{self.name}] Tone is negative, but {len(tried)} regenerations were already tried. Keeping current story.")
+            return
+
+        key = origin
+        earlier = [attempt for attempt in attempts if attempt["key"] == key]
+        if earlier and self.regeneration_policy == REGENERATION_REUSE:
+            logger.info(f"[{self.name}] Tone is negative. Reusing the story of an identical earlier attempt.")
+            yield self._state_event(ctx, {"current_story": earlier[-1]["story"]})
+            return
+        if earlier and self.regeneration_policy == REGENERATION_PERTURB:
+            # The note changes the resolved instruction, and so the memo key
+            note = (
+                f"(Attempt {len(tried) + 2}: earlier versions read as negative. "
+                "Take a different angle with a more hopeful tone.)"
+            )
+            yield self._state_event(ctx, {"regeneration_note": note})
+            key = regeneration_key(self.story_generator, state)
+
+        logger.info(f"[{self.name}] Tone is negative. Regenerating story...")
+        async for event in self.run_stage(ctx, self.story_generator, name="StoryGenerator (Regen)"):
+            logger.info("[%s] Event from StoryGenerator (Regen): %s", self.name, LazyEventLog(event))
+            yield event
+
+        attempts.append({"origin": origin, "key": key, "story": state.get("current_story")})
+        # Clear the note so it doesn't leak into the next first generation
+        yield self._state_event(ctx, {"regeneration_attempts": attempts, "regeneration_note": ""})
+
+    def _state_event(self, ctx: InvocationContext, state_delta: dict) -> Event:
+        """An event that only updates session state."""
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
     # --8<-- [end:executionlogic]
 
 # --8<-- [start:llmagents]
@@ -171,7 +573,7 @@ class StoryFlowAgent(BaseAgent):
 story_generator = LlmAgent(
     name="StoryGenerator",
     model=GEMINI_2_FLASH,
-    instruction="""You are a story writer. Write a short story (around 100 words), on the following topic: {topic}""",
+    instruction="""You are a story writer. Write a short story (around 100 words), on the following topic: {topic} {regeneration_note?}""",
     input_schema=None,
     output_key="current_story",  # Key for storing output in session state
 )
@@ -276,4 +678,123 @@ async def call_agent_async(user_input_topic: str):
 # Note: In Colab, you can directly use 'await' at the top level.
 # If running this code as a standalone Python script, you'll need to use asyncio.run() or manage the event loop.
 await call_agent_async("a lonely robot finding a friend in a junkyard")
-# --8<-- [end:story_flow_agent]
\ No newline at end of file
+# --8<-- [end:story_flow_agent]
+
+# --- Batch Story Generation ---
+class StoryResult(BaseModel):
+    """Outcome of one story in a batch run."""
+    topic: str
+    story: Optional[str] = None
+    tone: Optional[str] = None
+    model_calls: int = 0
+    total_tokens: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+async def generate_story(runner: Runner, topic: str) -> StoryResult:
+    """Runs the workflow for one topic in its own session on a shared runner."""
+    result = StoryResult(topic=topic)
+    started = time.monotonic()
+    session = None
+    try:
+        session = await runner.session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=uuid.uuid4().hex, state={"topic": topic}
+        )
+        content = types.Content(role='user', parts=[types.Part(text="Generate a story about the preset topic.")])
+        async for event in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=content):
+            # Every model response carries its usage metadata
+            if event.usage_metadata:
+                result.model_calls += 1
+                result.total_tokens += event.usage_metadata.total_token_count or 0
+        final_session = await runner.session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session.id
+        )
+        result.story = final_session.state.get("current_story")
+        result.tone = final_session.state.get("tone_check_result")
+    except Exception as e:
+        logger.exception(f"Story for topic {topic!r} failed")
+        result.error = str(e)
+    finally:
+        # Batch sessions aren't reused, free them right away
+        if session:
+            await runner.session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+        result.seconds = time.monotonic() - started
+    return result
+
+
+async def run_story_batch(
+    topics: Union[Iterable[str], AsyncIterable[str]],
+    concurrency: int = 4,
+    span_collector: Optional[InProcessSpanCollector] = None,
+) -> AsyncGenerator[StoryResult, None]:
+    """
+    Runs StoryFlowAgent over a list or stream of topics on one shared runner,
+    with at most `concurrency` stories in flight, and yields results as they finish.
+    Topics are read only as fast as slots free up. `span_collector` also
+    receives the stage spans of this batch.
+    """
+    runner = Runner(agent=story_flow_agent, app_name=APP_NAME, session_service=InMemorySessionService())
+    slots = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def run_one(topic: str):
+        try:
+            results.put_nowait(await generate_story(runner, topic))
+        finally:
+            slots.release()
+
+    async def schedule():
+        # Story tasks inherit the batch's collector
+        batch_spans.set(span_collector)
+        tasks = []
+        try:
+            if isinstance(topics, AsyncIterable):
+                async for topic in topics:
+                    await slots.acquire()
+                    tasks.append(asyncio.create_task(run_one(topic)))
+            else:
+                for topic in topics:
+                    await slots.acquire()
+                    tasks.append(asyncio.create_task(run_one(topic)))
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            results.put_nowait(None)
+
+    scheduler = asyncio.create_task(schedule())
+    try:
+        while (result := await results.get()) is not None:
+            yield result
+        # Surface a failure that ended the batch early (e.g. from the topic stream)
+        await scheduler
+    finally:
+        scheduler.cancel()
+
+
+async def run_batch_async(topics: Union[Iterable[str], AsyncIterable[str]], concurrency: int = 4) -> List[StoryResult]:
+    """Runs a batch, logging each story as it finishes and the overall throughput."""
+    started = time.monotonic()
+    finished: List[StoryResult] = []
+    spans = InProcessSpanCollector()
+    async for result in run_story_batch(topics, concurrency, span_collector=spans):
+        finished.append(result)
+        logger.info(
+            f"Story {len(finished)} done in {result.seconds:.1f}s "
+            f"({result.model_calls} model calls, tone: {result.tone}): {result.topic}"
+        )
+
+    minutes = (time.monotonic() - started) / 60
+    succeeded = [result for result in finished if result.error is None]
+    calls_per_story = sum(result.model_calls for result in succeeded) / max(len(succeeded), 1)
+    logger.info(
+        f"Batch finished: {len(succeeded)}/{len(finished)} stories in {minutes * 60:.1f}s, "
+        f"{len(succeeded) / minutes if minutes else 0:.1f} stories/min, "
+        f"{calls_per_story:.1f} model calls/story, concurrency {concurrency}"
+    )
+    logger.info(f"Stage timings: {json.dumps(spans.summary(), indent=2)}")
+    return finished
+
+# Example:
+# await run_batch_async(["a lighthouse keeper's last night", "a dragon afraid of heights"], concurrency=8)
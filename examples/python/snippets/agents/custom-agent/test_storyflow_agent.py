@@ -0,0 +1,131 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the negative-tone regeneration memo of StoryFlowAgent.
+
+storyflow_agent.py is a notebook-style snippet with top-level awaits, so it
+is loaded without them. The story generator is replaced by a stub that
+records its runs, and state deltas are applied as the Runner would.
+"""
+
+import ast
+import asyncio
+import types
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+MODULE_PATH = Path(__file__).with_name("storyflow_agent.py")
+
+
+def load_storyflow_module():
+    tree = ast.parse(MODULE_PATH.read_text())
+    tree.body = [
+        node for node in tree.body
+        if not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Await))
+    ]
+    module = types.ModuleType("storyflow_agent")
+    module.__file__ = str(MODULE_PATH)
+    exec(compile(tree, str(MODULE_PATH), "exec"), module.__dict__)
+    return module
+
+
+storyflow = load_storyflow_module()
+
+
+@pytest.fixture
+def generator_runs(monkeypatch):
+    """Replaces sub-agent runs by a stub writing a new story per run"""
+    runs = []
+
+    async def run_stage(self, ctx, agent, name=None):
+        runs.append(dict(ctx.session.state))
+        ctx.session.state["current_story"] = f"story {len(runs)}"
+        return
+        yield
+
+    monkeypatch.setattr(storyflow.StoryFlowAgent, "run_stage", run_stage)
+    return runs
+
+
+def regenerate(agent, state):
+    """Runs _regenerate_story, applying the state deltas of its events"""
+    ctx = types.SimpleNamespace(
+        session=types.SimpleNamespace(state=state), invocation_id="invocation", branch=None
+    )
+
+    async def run():
+        async for event in agent._regenerate_story(ctx):
+            if event.actions and event.actions.state_delta:
+                state.update(event.actions.state_delta)
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def set_policy(monkeypatch):
+    def set_policy(policy, max_regenerations=2):
+        monkeypatch.setattr(storyflow.story_flow_agent, "regeneration_policy", policy)
+        monkeypatch.setattr(storyflow.story_flow_agent, "max_regenerations", max_regenerations)
+        return storyflow.story_flow_agent
+    return set_policy
+
+
+def test_regeneration_key_treats_missing_optional_placeholder_as_empty():
+    generator = storyflow.story_generator
+    missing = storyflow.regeneration_key(generator, {"topic": "a kitten"})
+    cleared = storyflow.regeneration_key(generator, {"topic": "a kitten", "regeneration_note": ""})
+    assert missing == cleared
+
+
+def test_second_identical_regeneration_reuses_the_memo(generator_runs, set_policy):
+    agent = set_policy(storyflow.REGENERATION_REUSE)
+    state = {"topic": "a kitten", "current_story": "story 0"}
+
+    regenerate(agent, state)
+    regenerate(agent, state)
+
+    assert len(generator_runs) == 1
+    assert state["current_story"] == "story 1"
+
+
+def test_second_identical_regeneration_is_perturbed(generator_runs, set_policy):
+    agent = set_policy(storyflow.REGENERATION_PERTURB)
+    state = {"topic": "a kitten", "current_story": "story 0"}
+
+    regenerate(agent, state)
+    regenerate(agent, state)
+
+    assert len(generator_runs) == 2
+    assert not generator_runs[0].get("regeneration_note")
+    assert generator_runs[1]["regeneration_note"].startswith("(Attempt 3:")
+
+
+def test_regenerations_of_a_topic_share_the_cap(generator_runs, set_policy):
+    agent = set_policy(storyflow.REGENERATION_CAP, max_regenerations=2)
+    state = {"topic": "a kitten", "current_story": "story 0"}
+
+    for _ in range(3):
+        regenerate(agent, state)
+
+    assert len(generator_runs) == 2
+    attempts = state["regeneration_attempts"]
+    assert len({attempt["origin"] for attempt in attempts}) == 1
+
+    # Another topic in the same session has its own cap
+    state["topic"] = "a dragon"
+    regenerate(agent, state)
+    assert len(generator_runs) == 3
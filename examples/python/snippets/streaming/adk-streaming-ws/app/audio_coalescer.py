@@ -0,0 +1,71 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Coalesces small client PCM chunks into fixed-duration uplink frames.
+
+Browsers post audio in tiny chunks (one 128-sample render quantum, 8ms at
+16kHz). AudioCoalescer buffers them and calls `send` once per full frame of
+`frame_ms`, and flushes a partial frame after `max_latency_ms` so the model
+never waits long for the tail of an utterance.
+"""
+
+import asyncio
+
+# Frame durations a client may ask for in the connect handshake
+SUPPORTED_FRAME_MS = (20, 40, 100)
+
+# Client audio format: 16kHz, 16-bit, mono PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+class AudioCoalescer:
+    """Buffers PCM bytes and sends them in frames of `frame_ms`"""
+
+    def __init__(self, send, frame_ms=40, max_latency_ms=100):
+        self._send = send
+        self.frame_bytes = SAMPLE_RATE * SAMPLE_WIDTH * frame_ms // 1000
+        self._max_latency = max_latency_ms / 1000
+        self._buffer = bytearray()
+        self._flush_timer = None
+
+    def add(self, data):
+        """Buffers `data`, sending every full frame right away"""
+        self._buffer += data
+        while len(self._buffer) >= self.frame_bytes:
+            # Copy the frame out once, without an intermediate bytearray slice
+            with memoryview(self._buffer) as view:
+                frame = bytes(view[:self.frame_bytes])
+            self._send(frame)
+            del self._buffer[:self.frame_bytes]
+
+        if not self._buffer:
+            self._cancel_timer()
+        elif self._flush_timer is None:
+            # Bound how long a partial frame may wait
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self._max_latency, self.flush
+            )
+
+    def flush(self):
+        """Sends any buffered partial frame"""
+        self._cancel_timer()
+        if self._buffer:
+            self._send(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _cancel_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
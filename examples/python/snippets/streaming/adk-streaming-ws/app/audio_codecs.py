@@ -0,0 +1,119 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pluggable audio codecs for the client transport.
+
+The model consumes and produces raw PCM. A client may negotiate a compressed
+codec by mime type (the `audio_codec` query parameter): its audio is decoded
+to PCM before send_realtime(), and the model's PCM is encoded before it is
+sent. Raw 16kHz 16-bit PCM is 256 kbps; Opus voice is ~24 kbps.
+
+Codec instances are stateful and belong to one connection. Encoding and
+decoding run in a thread pool (see run_codec) so they don't block the event
+loop; each connection awaits its calls in order.
+
+Opus needs the optional `opuslib` package (and libopus):
+`pip install adk-streaming-ws[opus]`.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import opuslib
+except ImportError:
+    opuslib = None
+
+# Client and model audio formats: mono 16-bit PCM, 16kHz in and 24kHz out
+INPUT_SAMPLE_RATE = 16000
+OUTPUT_SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+_executor = ThreadPoolExecutor(thread_name_prefix="audio-codec")
+
+
+class PcmCodec:
+    """Raw PCM, passed through without any work"""
+    mime_type = "audio/pcm"
+    passthrough = True
+
+    def decode(self, data):
+        return data
+
+    def encode(self, pcm):
+        return [pcm]
+
+    def flush(self):
+        return []
+
+
+class OpusCodec:
+    """Opus packets in both directions, one packet per message"""
+    mime_type = "audio/opus"
+    passthrough = False
+
+    # Duration of the encoded packets
+    FRAME_MS = 20
+    # Longest Opus packet, the decode buffer size
+    MAX_FRAME_MS = 120
+
+    def __init__(self):
+        self._decoder = opuslib.Decoder(INPUT_SAMPLE_RATE, 1)
+        self._encoder = opuslib.Encoder(OUTPUT_SAMPLE_RATE, 1, opuslib.APPLICATION_VOIP)
+        self._frame_samples = OUTPUT_SAMPLE_RATE * self.FRAME_MS // 1000
+        self._frame_bytes = self._frame_samples * SAMPLE_WIDTH
+        self._pending = bytearray()
+
+    def decode(self, packet):
+        """Decodes one client packet to PCM"""
+        return self._decoder.decode(bytes(packet), INPUT_SAMPLE_RATE * self.MAX_FRAME_MS // 1000)
+
+    def encode(self, pcm):
+        """Encodes model PCM into as many full packets as it fills"""
+        self._pending += pcm
+        packets = []
+        while len(self._pending) >= self._frame_bytes:
+            packets.append(self._encoder.encode(bytes(self._pending[:self._frame_bytes]), self._frame_samples))
+            del self._pending[:self._frame_bytes]
+        return packets
+
+    def flush(self):
+        """Encodes the partial packet left at the end of a turn, padded with silence"""
+        if not self._pending:
+            return []
+        self._pending += bytes(self._frame_bytes - len(self._pending))
+        return self.encode(b"")
+
+
+_CODECS = {
+    PcmCodec.mime_type: PcmCodec,
+    OpusCodec.mime_type: OpusCodec,
+}
+
+
+def available_codecs():
+    """Returns the mime types of the codecs usable in this environment"""
+    return [mime_type for mime_type in _CODECS if mime_type != OpusCodec.mime_type or opuslib]
+
+
+def create_codec(mime_type):
+    """Returns a new codec for the mime type, ValueError if it is not available"""
+    if mime_type not in available_codecs():
+        raise ValueError(f"Audio codec not supported: {mime_type} (available: {available_codecs()})")
+    return _CODECS[mime_type]()
+
+
+async def run_codec(function, *args):
+    """Runs a codec method in the codec thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, function, *args)
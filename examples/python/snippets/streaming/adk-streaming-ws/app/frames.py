@@ -0,0 +1,112 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Binary WebSocket frames for raw audio.
+
+In the "binary" protocol mode, audio travels as binary WebSocket frames
+made of a 1-byte frame type followed by the raw payload. Text and control
+messages (turn_complete, interrupted) stay as JSON text frames.
+
+On the multiplexed endpoint, binary frames carry a 4-byte channel id
+between the frame type and the payload (MUX_HEADER), and JSON messages
+carry a "channel" field.
+"""
+
+import struct
+
+# Protocol modes, selected by the client with the `protocol` query parameter
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+# Frame types
+FRAME_AUDIO_PCM = 0x01
+FRAME_AUDIO_OPUS = 0x02
+
+_FRAME_TYPES = {
+    "audio/pcm": FRAME_AUDIO_PCM,
+    "audio/opus": FRAME_AUDIO_OPUS,
+}
+_MIME_TYPES = {frame_type: mime_type for mime_type, frame_type in _FRAME_TYPES.items()}
+
+HEADER = struct.Struct("!B")
+MUX_HEADER = struct.Struct("!BI")
+
+
+def _frame_type(mime_type):
+    frame_type = _FRAME_TYPES.get(mime_type)
+    if frame_type is None:
+        raise ValueError(f"Mime type not supported in binary frames: {mime_type}")
+    return frame_type
+
+
+def encode_frame(mime_type, data):
+    """Builds a binary frame for the given mime type and payload"""
+    return HEADER.pack(_frame_type(mime_type)) + data
+
+
+class FrameEncoder:
+    """Encodes binary frames into one reusable buffer
+
+    The header and payload are written through memoryviews, so encoding a
+    frame allocates nothing once the buffer has grown to the largest frame.
+    The returned memoryview is only valid until the next encode() call: send
+    (and await) each frame before encoding the next one. ASGI only requires
+    servers to send `bytes`: uvicorn's websockets backends (the default with
+    uvicorn[standard]) take memoryviews, but some servers, like older wsproto
+    releases, raise TypeError and need a bytes() copy (see send_outbound_messages).
+    """
+
+    def __init__(self, initial_size=8192):
+        self._buffer = bytearray(initial_size)
+
+    def encode(self, mime_type, data, channel=None):
+        """Encodes a frame, with the multiplexed header if `channel` is given"""
+        header = HEADER if channel is None else MUX_HEADER
+        size = header.size + len(data)
+        if size > len(self._buffer):
+            # Replace rather than resize: a previous frame may still be exported
+            self._buffer = bytearray(max(size, 2 * len(self._buffer)))
+        view = memoryview(self._buffer)
+        if channel is None:
+            HEADER.pack_into(view, 0, _frame_type(mime_type))
+        else:
+            MUX_HEADER.pack_into(view, 0, _frame_type(mime_type), channel)
+        view[header.size:size] = data
+        return view[:size]
+
+
+def decode_frame(frame):
+    """Splits a binary frame into its mime type and payload
+
+    The payload is a memoryview into `frame`, so it is not copied.
+    """
+    if len(frame) < HEADER.size:
+        raise ValueError(f"Binary frame too short: {len(frame)} bytes")
+    (frame_type,) = HEADER.unpack_from(frame)
+    mime_type = _MIME_TYPES.get(frame_type)
+    if mime_type is None:
+        raise ValueError(f"Unknown binary frame type: {frame_type:#04x}")
+    return mime_type, memoryview(frame)[HEADER.size:]
+
+
+def decode_mux_frame(frame):
+    """Splits a multiplexed binary frame into its channel, mime type and payload"""
+    if len(frame) < MUX_HEADER.size:
+        raise ValueError(f"Multiplexed frame too short: {len(frame)} bytes")
+    frame_type, channel = MUX_HEADER.unpack_from(frame)
+    mime_type = _MIME_TYPES.get(frame_type)
+    if mime_type is None:
+        raise ValueError(f"Unknown binary frame type: {frame_type:#04x}")
+    return channel, mime_type, memoryview(frame)[MUX_HEADER.size:]
@@ -12,10 +12,48 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import os
+import re
 from google.adk.agents import Agent
 from google.adk.tools import google_search  # Import the tool
 
+# Canned reports of the demo weather service
+WEATHER_REPORTS = {
+    "new york": "The weather in New York is sunny with a temperature of 25 degrees Celsius.",
+    "london": "It's cloudy in London with a temperature of 15 degrees Celsius.",
+    "tokyo": "Tokyo is experiencing light rain and a temperature of 18 degrees Celsius.",
+}
+
+# Latency of the demo weather service, standing in for a remote API call
+WEATHER_LOOKUP_SECONDS = float(os.getenv("WEATHER_LOOKUP_SECONDS", "1.0"))
+
+
+async def get_weather(city: str) -> dict:
+    """Retrieves the current weather report for a specified city.
+
+    Args:
+        city (str): The name of the city (e.g., "New York", "London", "Tokyo").
+
+    Returns:
+        dict: A dictionary containing the weather information.
+              Includes a 'status' key ('success' or 'error').
+              If 'success', includes a 'report' key with weather details.
+              If 'error', includes an 'error_message' key.
+    """
+    await asyncio.sleep(WEATHER_LOOKUP_SECONDS)
+    report = WEATHER_REPORTS.get(city.strip().lower())
+    if report is None:
+        return {"status": "error", "error_message": f"Weather information for '{city}' is not available."}
+    return {"status": "success", "report": report}
+
+
+def cities_mentioned(text: str) -> list:
+    """Returns the cities of WEATHER_REPORTS named in `text`"""
+    text = " ".join(re.findall(r"\w+", text.lower()))
+    return [city for city in WEATHER_REPORTS if re.search(rf"\b{city}\b", text)]
+
+
 root_agent = Agent(
    # A unique name for the agent.
    name="google_search_agent",
@@ -24,7 +62,11 @@ root_agent = Agent(
    # A short description of the agent's purpose.
    description="Agent to answer questions using Google Search.",
    # Instructions to set the agent's behavior.
-   instruction="Answer the question using the Google Search tool.",
-   # Add google_search tool to perform grounding with Google search.
-   tools=[google_search],
+   instruction=(
+       "Answer the question using the Google Search tool. "
+       "For the current weather in a city, use the get_weather tool."
+   ),
+   # Add google_search tool to perform grounding with Google search, and a
+   # local function tool
+   tools=[google_search, get_weather],
 )
@@ -16,8 +16,10 @@ import os
 import json
 import asyncio
 import base64
+import logging
 import warnings
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -38,13 +40,42 @@ from google.adk.sessions.in_memory_session_service import InMemorySessionService
 
 from fastapi import FastAPI, WebSocket
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.websockets import WebSocketDisconnect
 
-from google_search_agent.agent import root_agent
+from google_search_agent.agent import cities_mentioned, get_weather, root_agent
+from audio_codecs import PcmCodec, available_codecs, create_codec, run_codec
+from audio_coalescer import SUPPORTED_FRAME_MS, AudioCoalescer
+from frames import PROTOCOL_BINARY, PROTOCOL_JSON, PROTOCOLS, FrameEncoder, decode_frame, decode_mux_frame
+from mux import (
+    MUX_CLOSE,
+    MUX_CLOSED,
+    MUX_OPEN,
+    MuxChannel,
+    SerializedWebSocket,
+    channel_key,
+    parse_channel_id,
+    parse_user_id,
+)
+from prewarm import SpeculativePrewarmer, ToolPrefetcher, prefetched_tool
+from outbound import (
+    KIND_AUDIO,
+    KIND_CONTROL,
+    KIND_TEXT,
+    POLICIES,
+    OutboundOverflow,
+    OutboundQueue,
+)
+from session_metrics import SessionMetrics, render_prometheus
+from session_reaper import SessionReaper
+from streaming_logging import SessionLog, setup_logging
 
 warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 
+# Queued, structured logging keeps stdout I/O off the event loop
+setup_logging(os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
 #
 # ADK Streaming
 #
@@ -52,9 +83,59 @@ warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 # Application configuration
 APP_NAME = "adk-streaming-ws"
 
+# Outbound queue limits and overflow policy (see outbound.py)
+OUTBOUND_QUEUE_MAX_MESSAGES = int(os.getenv("OUTBOUND_QUEUE_MAX_MESSAGES", "256"))
+OUTBOUND_QUEUE_MAX_BYTES = int(os.getenv("OUTBOUND_QUEUE_MAX_BYTES", str(1024 * 1024)))
+OUTBOUND_QUEUE_POLICY = os.getenv("OUTBOUND_QUEUE_POLICY", "drop_partial_text")
+if OUTBOUND_QUEUE_POLICY not in POLICIES:
+    raise ValueError(f"OUTBOUND_QUEUE_POLICY must be one of {POLICIES}")
+
+# Uplink audio frame duration (clients may pick one of SUPPORTED_FRAME_MS
+# with the `audio_frame_ms` query parameter) and the max time a partial
+# frame is held back
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "40"))
+if AUDIO_FRAME_MS not in SUPPORTED_FRAME_MS:
+    raise ValueError(f"AUDIO_FRAME_MS must be one of {SUPPORTED_FRAME_MS}")
+AUDIO_MAX_LATENCY_MS = int(os.getenv("AUDIO_MAX_LATENCY_MS", "100"))
+
+# Opt-in speculative pre-warming of voice turns on partial input
+# transcription: tool calls are started while the user is still speaking
+# (see prewarm.py)
+SPECULATIVE_PREWARM = os.getenv("SPECULATIVE_PREWARM", "false").lower() == "true"
+SPECULATIVE_PREWARM_DEBOUNCE_MS = int(os.getenv("SPECULATIVE_PREWARM_DEBOUNCE_MS", "300"))
+
+# Max user sessions multiplexed over one /ws/mux connection (see mux.py)
+MUX_MAX_CHANNELS = int(os.getenv("MUX_MAX_CHANNELS", "1000"))
+
+# Idle session TTL and ceilings on the sessions kept in memory (see session_reaper.py)
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+SESSION_REAPER_INTERVAL_SECONDS = float(os.getenv("SESSION_REAPER_INTERVAL_SECONDS", "60"))
+
 # Initialize session service
 session_service = InMemorySessionService()
 
+# Deletes idle sessions so memory stays bounded over long uptimes
+session_reaper = SessionReaper(
+    session_service,
+    APP_NAME,
+    idle_ttl_seconds=SESSION_IDLE_TTL_SECONDS,
+    max_sessions=SESSION_MAX_SESSIONS,
+    max_bytes=SESSION_MAX_BYTES,
+    interval_seconds=SESSION_REAPER_INTERVAL_SECONDS,
+)
+
+# ToolPrefetchers of the voice sessions being pre-warmed, by session id
+tool_prefetchers = {}
+
+# With pre-warming on, get_weather uses the calls prefetched during the turn
+if SPECULATIVE_PREWARM:
+    root_agent.tools = [
+        prefetched_tool(tool, tool_prefetchers) if tool is get_weather else tool
+        for tool in root_agent.tools
+    ]
+
 # APP_NAME and session_service are defined in the Initialization section above
 runner = Runner(
     app_name=APP_NAME,
@@ -78,6 +159,8 @@ async def start_agent_session(user_id, is_audio=False):
             user_id=user_id,
             session_id=session_id,
         )
+    # Keep the reaper off this session until the client disconnects
+    session_reaper.attach(user_id, session.id)
 
     # Configure response format based on client preference
     # IMPORTANT: You must choose exactly ONE modality per session
@@ -91,12 +174,14 @@ async def start_agent_session(user_id, is_audio=False):
     modality = "AUDIO" if (is_audio or is_native_audio) else "TEXT"
 
     # Enable session resumption for improved reliability
-    # For audio mode, enable output transcription to get text for UI display
+    # For audio mode, enable output transcription to get text for UI display,
+    # and input transcription when speculative pre-warming is on
     run_config = RunConfig(
         streaming_mode=StreamingMode.BIDI,
         response_modalities=[modality],
         session_resumption=types.SessionResumptionConfig(),
         output_audio_transcription=types.AudioTranscriptionConfig() if (is_audio or is_native_audio) else None,
+        input_audio_transcription=types.AudioTranscriptionConfig() if (is_audio and SPECULATIVE_PREWARM) else None,
     )
 
     # Create LiveRequestQueue in async context (recommended best practice)
@@ -110,13 +195,43 @@ async def start_agent_session(user_id, is_audio=False):
         live_request_queue=live_request_queue,
         run_config=run_config,
     )
-    return live_events, live_request_queue
+    return live_events, live_request_queue, session.id
+
+
+async def prewarm_turn(prefetcher, transcript):
+    """Speculative work for a voice turn that is still being spoken
 
+    Starts get_weather for the cities already named, so the tool call the
+    model makes once the user stops speaking finds its result in flight or ready.
+    """
+    for city in cities_mentioned(transcript):
+        prefetcher.start(get_weather, city=city)
+
+
+async def agent_to_client_messaging(live_events, outbound, metrics, prewarmer=None):
+    """Agent to client communication
 
-async def agent_to_client_messaging(websocket, live_events):
-    """Agent to client communication"""
+    Queues messages on the connection's OutboundQueue instead of awaiting the
+    socket, so a slow client never stalls consumption of the live events.
+    With a prewarmer, input transcription starts speculative work for the
+    turn the user is still speaking.
+    """
     try:
         async for event in live_events:
+            if prewarmer:
+                if event.input_transcription and event.input_transcription.text:
+                    prewarmer.on_transcription(event.input_transcription.text)
+                if event.interrupted:
+                    prewarmer.on_interrupted()
+                elif event.turn_complete:
+                    prewarmer.on_turn_complete()
+
+            # Any text, audio or transcript stops the time-to-first-token clock
+            part = event.content and event.content.parts and event.content.parts[0]
+            metrics.on_live_event(bool(
+                (event.output_transcription and event.output_transcription.text)
+                or (part and (part.text or part.inline_data))
+            ))
 
             # Handle output audio transcription for native audio models
             # This provides text representation of audio output for UI display
@@ -127,8 +242,7 @@ async def agent_to_client_messaging(websocket, live_events):
                     "data": transcript_text,
                     "is_transcript": True
                 }
-                await websocket.send_text(json.dumps(message))
-                print(f"[AGENT TO CLIENT]: audio transcript: {transcript_text}")
+                outbound.put(KIND_TEXT, message)
                 # Continue to process audio data if present
                 # Don't return here as we may want to send both transcript and audio
 
@@ -137,17 +251,12 @@ async def agent_to_client_messaging(websocket, live_events):
                 event.content and event.content.parts and event.content.parts[0]
             )
             if part:
-                # Audio data must be Base64-encoded for JSON transport
+                # Audio is queued as raw bytes and encoded by the sender
                 is_audio = part.inline_data and part.inline_data.mime_type.startswith("audio/pcm")
                 if is_audio:
                     audio_data = part.inline_data and part.inline_data.data
                     if audio_data:
-                        message = {
-                            "mime_type": "audio/pcm",
-                            "data": base64.b64encode(audio_data).decode("ascii")
-                        }
-                        await websocket.send_text(json.dumps(message))
-                        print(f"[AGENT TO CLIENT]: audio/pcm: {len(audio_data)} bytes.")
+                        outbound.put(KIND_AUDIO, audio_data)
 
                 # If it's text and a partial text, send it (for cascade audio models or text mode)
                 if part.text and event.partial:
@@ -155,57 +264,194 @@ async def agent_to_client_messaging(websocket, live_events):
                         "mime_type": "text/plain",
                         "data": part.text
                     }
-                    await websocket.send_text(json.dumps(message))
-                    print(f"[AGENT TO CLIENT]: text/plain: {message}")
+                    outbound.put(KIND_TEXT, message)
 
             # If the turn complete or interrupted, send it
             if event.turn_complete or event.interrupted:
+                # Queued audio and partial text are stale once the user barges in
+                if event.interrupted:
+                    outbound.discard(KIND_AUDIO)
+                    outbound.discard(KIND_TEXT)
                 message = {
                     "turn_complete": event.turn_complete,
                     "interrupted": event.interrupted,
                 }
-                await websocket.send_text(json.dumps(message))
-                print(f"[AGENT TO CLIENT]: {message}")
+                outbound.put(KIND_CONTROL, message)
+    except OutboundOverflow as e:
+        logger.warning("Outbound queue overflow, disconnecting client: %s", e)
+        raise
+    except Exception:
+        logger.exception("Error in agent_to_client_messaging")
+    finally:
+        if prewarmer:
+            prewarmer.close()
+        # Let the sender drain what is left and stop
+        outbound.close()
+
+
+async def send_outbound_messages(websocket, outbound, session_log, metrics, protocol=PROTOCOL_JSON, channel=None, codec=None):
+    """Sends queued messages to the client
+
+    On the multiplexed endpoint, `channel` is added to every message. With a
+    compressed `codec`, audio is encoded in the codec thread pool first.
+    """
+
+    # Binary audio frames are written into one reusable buffer per connection,
+    # and copied to bytes for servers that don't send memoryviews
+    frame_encoder = FrameEncoder()
+    copy_frames = False
+    channel_field = {} if channel is None else {"channel": channel}
+    codec = codec or PcmCodec()
+
+    async def send_binary(frame):
+        nonlocal copy_frames
+        if not copy_frames:
+            try:
+                await websocket.send_bytes(frame)
+                return
+            except TypeError:
+                # ASGI only promises bytes: e.g. older wsproto rejects memoryviews
+                logger.info("Server doesn't send memoryviews, copying binary frames")
+                copy_frames = True
+        await websocket.send_bytes(bytes(frame))
+
+    async def send_audio(packets, pcm_bytes):
+        for packet in packets:
+            # Audio data is sent as a binary frame in binary protocol mode,
+            # or Base64-encoded for JSON transport
+            if protocol == PROTOCOL_BINARY:
+                frame = frame_encoder.encode(codec.mime_type, packet, channel=channel)
+                await send_binary(frame)
+            else:
+                frame = json.dumps({
+                    **channel_field,
+                    "mime_type": codec.mime_type,
+                    "data": base64.b64encode(packet).decode("ascii")
+                })
+                await websocket.send_text(frame)
+            # Count the PCM duration once, with the first packet
+            metrics.on_client_message_sent(len(frame), audio_bytes=pcm_bytes)
+            session_log.message("agent_to_client", codec.mime_type, len(packet))
+            pcm_bytes = 0
+
+    try:
+        while (message := await outbound.get()) is not None:
+            kind, data = message
+            if kind == KIND_AUDIO:
+                packets = [data] if codec.passthrough else await run_codec(codec.encode, data)
+                await send_audio(packets, len(data))
+            else:
+                if kind == KIND_CONTROL and not codec.passthrough:
+                    # Send the tail of the turn's audio before turn_complete / interrupted
+                    await send_audio(await run_codec(codec.flush), 0)
+                frame = json.dumps({**channel_field, **data})
+                await websocket.send_text(frame)
+                metrics.on_client_message_sent(len(frame))
+                session_log.message(
+                    "agent_to_client",
+                    data.get("mime_type", "control"),
+                    len(data.get("data", "")),
+                    detail=data,
+                )
     except WebSocketDisconnect:
-        print("Client disconnected from agent_to_client_messaging")
-    except Exception as e:
-        print(f"Error in agent_to_client_messaging: {e}")
+        logger.info("Client disconnected from send_outbound_messages")
+    except Exception:
+        logger.exception("Error in send_outbound_messages")
+
 
+def create_audio_coalescer(live_request_queue, audio_frame_ms):
+    """Coalesces client audio into frames of audio_frame_ms for send_realtime()"""
 
-async def client_to_agent_messaging(websocket, live_request_queue):
+    # send_realtime() sends audio in "realtime mode"
+    # Data flows continuously without turn boundaries, enabling natural conversation
+    return AudioCoalescer(
+        lambda chunk: live_request_queue.send_realtime(Blob(data=chunk, mime_type="audio/pcm")),
+        frame_ms=audio_frame_ms,
+        max_latency_ms=AUDIO_MAX_LATENCY_MS,
+    )
+
+
+def forward_client_message(live_request_queue, audio_coalescer, session_log, metrics, mime_type, data, size):
+    """Forwards one client message (text, or decoded audio bytes) to the agent"""
+    if mime_type == "text/plain":
+        # send_content() sends text in "turn-by-turn mode"
+        # This signals a complete turn to the model, triggering immediate response
+        # Send buffered audio first so it stays ahead of the text turn
+        audio_coalescer.flush()
+        content = Content(role="user", parts=[Part.from_text(text=data)])
+        live_request_queue.send_content(content=content)
+        metrics.on_client_message(size)
+        metrics.on_send_content()
+        session_log.message("client_to_agent", mime_type, len(data), detail=data)
+    elif mime_type == "audio/pcm":
+        audio_coalescer.add(data)
+        metrics.on_client_message(size, audio_bytes=len(data))
+        session_log.message("client_to_agent", mime_type, len(data))
+    else:
+        raise ValueError(f"Mime type not supported: {mime_type}")
+
+
+def parse_client_message(message):
+    """Returns the mime type and data of a JSON client message"""
+    mime_type = message["mime_type"]
+    data = message["data"]
+    if mime_type.startswith("audio/"):
+        # Audio is Base64-encoded for JSON transport, decode before sending
+        data = base64.b64decode(data)
+    return mime_type, data
+
+
+async def decode_client_audio(codec, mime_type, data):
+    """Decodes compressed client audio to PCM in the codec thread pool"""
+    if codec.passthrough or mime_type != codec.mime_type:
+        return mime_type, data
+    return PcmCodec.mime_type, await run_codec(codec.decode, data)
+
+
+async def client_to_agent_messaging(websocket, live_request_queue, session_log, metrics, audio_frame_ms=AUDIO_FRAME_MS, codec=None):
     """Client to agent communication"""
+
+    # Small client chunks are coalesced into frames of audio_frame_ms first
+    audio_coalescer = create_audio_coalescer(live_request_queue, audio_frame_ms)
+    codec = codec or PcmCodec()
     try:
         while True:
-            message_json = await websocket.receive_text()
-            message = json.loads(message_json)
-            mime_type = message["mime_type"]
-            data = message["data"]
-
-            if mime_type == "text/plain":
-                # send_content() sends text in "turn-by-turn mode"
-                # This signals a complete turn to the model, triggering immediate response
-                content = Content(role="user", parts=[Part.from_text(text=data)])
-                live_request_queue.send_content(content=content)
-                print(f"[CLIENT TO AGENT]: {data}")
-            elif mime_type == "audio/pcm":
-                # send_realtime() sends audio in "realtime mode"
-                # Data flows continuously without turn boundaries, enabling natural conversation
-                # Audio is Base64-encoded for JSON transport, decode before sending
-                decoded_data = base64.b64decode(data)
-                live_request_queue.send_realtime(Blob(data=decoded_data, mime_type=mime_type))
+            # Accept both text (JSON) and binary frames
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+
+            # Binary frames carry raw audio with a small typed header
+            if frame.get("bytes") is not None:
+                mime_type, data = decode_frame(frame["bytes"])
+                size = len(frame["bytes"])
             else:
-                raise ValueError(f"Mime type not supported: {mime_type}")
+                mime_type, data = parse_client_message(json.loads(frame["text"]))
+                size = len(frame["text"])
+            mime_type, data = await decode_client_audio(codec, mime_type, data)
+            forward_client_message(
+                live_request_queue, audio_coalescer, session_log, metrics, mime_type, data, size
+            )
     except WebSocketDisconnect:
-        print("Client disconnected from client_to_agent_messaging")
-    except Exception as e:
-        print(f"Error in client_to_agent_messaging: {e}")
+        logger.info("Client disconnected from client_to_agent_messaging")
+    except Exception:
+        logger.exception("Error in client_to_agent_messaging")
+    finally:
+        audio_coalescer.flush()
 
 
 #
 # FastAPI web app
 #
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    session_reaper.start()
+    yield
+    await session_reaper.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 STATIC_DIR = Path("static")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -217,41 +463,329 @@ async def root():
     return FileResponse(os.path.join(STATIC_DIR, "index.html"))
 
 
+# Outbound queues of connected clients, for queue-depth metrics. Direct
+# clients are keyed by user id, multiplexed channels by channel_key()
+outbound_queues = {}
+
+# Users with a live session, on either endpoint: a user's ADK session can
+# only be run by one run_live() at a time
+live_users = set()
+
+
+@app.get("/outbound/stats")
+async def outbound_stats_endpoint():
+    """Outbound queue depth and drop counters per connected client"""
+    return {user_id: outbound.stats() for user_id, outbound in outbound_queues.items()}
+
+
+@app.get("/sessions/stats")
+async def sessions_stats_endpoint():
+    """Sessions kept in memory and eviction counters"""
+    return session_reaper.stats()
+
+
+# Resource accounting of connected clients (see session_metrics.py)
+session_metrics = {}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Per-session metrics in the Prometheus text format"""
+    return render_prometheus(session_metrics)
+
+
+async def run_mux_channel(websocket, channel_id, channel, live_events, outbound, protocol, channels):
+    """Runs one multiplexed channel until its agent side ends, the client
+    goes away or the channel is closed, then releases it"""
+    agent_to_client_task = asyncio.create_task(
+        agent_to_client_messaging(live_events, outbound, channel.metrics)
+    )
+    outbound_task = asyncio.create_task(
+        send_outbound_messages(
+            websocket, outbound, channel.session_log, channel.metrics, protocol,
+            channel=channel_id, codec=channel.codec,
+        )
+    )
+    reason = "closed"
+    try:
+        done, pending = await asyncio.wait(
+            [agent_to_client_task, outbound_task], return_when=asyncio.FIRST_COMPLETED
+        )
+        if done == {agent_to_client_task} and agent_to_client_task.exception() is None:
+            # The agent side ended normally, let the sender drain the queue
+            await asyncio.wait(pending)
+        reason = "ended"
+        if agent_to_client_task.done() and isinstance(agent_to_client_task.exception(), OutboundOverflow):
+            reason = "outbound_overflow"
+    finally:
+        agent_to_client_task.cancel()
+        outbound_task.cancel()
+        channel.audio_coalescer.flush()
+        channel.live_request_queue.close()
+        if channels.get(channel_id) is channel:
+            del channels[channel_id]
+        outbound_queues.pop(channel.key, None)
+        session_metrics.pop(channel.key, None)
+        channel.session_log.summary()
+        await session_reaper.detach(channel.user_id)
+        live_users.discard(channel.user_id)
+        try:
+            await websocket.send_text(json.dumps({"channel": channel_id, "type": MUX_CLOSED, "reason": reason}))
+        except Exception:
+            # The connection is already gone
+            pass
+        logger.info("Channel #%s closed: %s", channel_id, reason, extra={"session": channel.user_id})
+
+
+async def open_mux_channel(websocket, channel_id, user_id, is_audio, protocol, audio_frame_ms, audio_codec, channels):
+    """Starts an agent session of the user for a new multiplexed channel"""
+    key = channel_key(websocket, channel_id)
+    live_users.add(user_id)
+    try:
+        live_events, live_request_queue, _ = await start_agent_session(user_id, is_audio)
+    except Exception:
+        live_users.discard(user_id)
+        raise
+
+    outbound = OutboundQueue(
+        max_messages=OUTBOUND_QUEUE_MAX_MESSAGES,
+        max_bytes=OUTBOUND_QUEUE_MAX_BYTES,
+        policy=OUTBOUND_QUEUE_POLICY,
+    )
+    outbound_queues[key] = outbound
+    channel = MuxChannel(
+        user_id=user_id,
+        key=key,
+        live_request_queue=live_request_queue,
+        audio_coalescer=create_audio_coalescer(live_request_queue, audio_frame_ms),
+        session_log=SessionLog(logger, user_id),
+        metrics=SessionMetrics(live_request_queue, outbound),
+        codec=create_codec(audio_codec),
+    )
+    session_metrics[key] = channel.metrics
+
+    channels[channel_id] = channel
+    channel.task = asyncio.create_task(
+        run_mux_channel(websocket, channel_id, channel, live_events, outbound, protocol, channels)
+    )
+    logger.info(
+        "Channel #%s opened for user %s, audio mode: %s", channel_id, user_id, is_audio,
+        extra={"session": user_id},
+    )
+
+
+# Registered before /ws/{user_id}, which would otherwise match "mux"
+@app.websocket("/ws/mux")
+async def mux_websocket_endpoint(
+    websocket: WebSocket,
+    protocol: str = PROTOCOL_JSON,
+    audio_frame_ms: int = AUDIO_FRAME_MS,
+    audio_codec: str = PcmCodec.mime_type,
+):
+    """Multiplexed websocket endpoint: many user sessions, one connection
+
+    Channels are opened and closed with JSON control messages, and every
+    message carries its channel id (see mux.py and frames.py). Messages are
+    fanned out to each channel's LiveRequestQueue, and the channels'
+    outbound queues are fanned back in onto this connection.
+    """
+
+    if protocol not in PROTOCOLS:
+        await websocket.close(code=1008, reason=f"Protocol not supported: {protocol}")
+        return
+    if audio_frame_ms not in SUPPORTED_FRAME_MS:
+        await websocket.close(code=1008, reason=f"Audio frame size not supported: {audio_frame_ms}ms")
+        return
+    if audio_codec not in available_codecs():
+        await websocket.close(code=1008, reason=f"Audio codec not supported: {audio_codec}")
+        return
+
+    await websocket.accept()
+    logger.info("Multiplexed client connected, protocol: %s, audio frame: %sms", protocol, audio_frame_ms)
+
+    # Channel senders share the connection, one send at a time
+    sender = SerializedWebSocket(websocket)
+    channels = {}
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+
+            try:
+                if frame.get("bytes") is not None:
+                    channel_id, mime_type, data = decode_mux_frame(frame["bytes"])
+                    size = len(frame["bytes"])
+                else:
+                    message = json.loads(frame["text"])
+                    channel_id = parse_channel_id(message["channel"])
+                    message_type = message.get("type")
+                    if message_type == MUX_OPEN:
+                        user_id = parse_user_id(message.get("user_id"))
+                        reason = None
+                        if channel_id in channels or len(channels) >= MUX_MAX_CHANNELS:
+                            reason = "rejected"
+                        elif user_id in live_users:
+                            reason = "user_already_connected"
+                        if reason:
+                            await sender.send_text(json.dumps(
+                                {"channel": channel_id, "type": MUX_CLOSED, "reason": reason}
+                            ))
+                        else:
+                            await open_mux_channel(
+                                sender, channel_id, user_id, bool(message.get("is_audio")),
+                                protocol, audio_frame_ms, audio_codec, channels,
+                            )
+                        continue
+                    if message_type == MUX_CLOSE:
+                        if channel_id in channels:
+                            channels[channel_id].task.cancel()
+                        continue
+                    mime_type, data = parse_client_message(message)
+                    size = len(frame["text"])
+
+                channel = channels.get(channel_id)
+                if channel is None:
+                    raise ValueError(f"Channel not open: {channel_id}")
+                mime_type, data = await decode_client_audio(channel.codec, mime_type, data)
+                forward_client_message(
+                    channel.live_request_queue, channel.audio_coalescer,
+                    channel.session_log, channel.metrics, mime_type, data, size,
+                )
+            except (ValueError, KeyError) as e:
+                # A bad message only affects its own channel, keep the connection
+                logger.warning("Dropped multiplexed message: %r", e)
+    except Exception:
+        logger.exception("Error in mux_websocket_endpoint")
+    finally:
+        # Close every channel still open on this connection
+        tasks = [channel.task for channel in channels.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("Multiplexed client disconnected, %s channels closed", len(tasks))
+
+
 @app.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int, is_audio: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    user_id: int,
+    is_audio: str,
+    protocol: str = PROTOCOL_JSON,
+    audio_frame_ms: int = AUDIO_FRAME_MS,
+    audio_codec: str = PcmCodec.mime_type,
+):
     """Client websocket endpoint
 
+    With protocol=binary, audio is exchanged as binary frames (see frames.py)
+    and JSON text frames are used only for text and control messages.
+    audio_frame_ms negotiates the duration of the audio frames forwarded to
+    the model (see audio_coalescer.py), and audio_codec the mime type of the
+    client's audio in both directions (see audio_codecs.py).
+
     This async function creates the LiveRequestQueue in an async context,
     which is the recommended best practice from the ADK documentation.
     This ensures the queue uses the correct event loop.
     """
 
-    await websocket.accept()
-    print(f"Client #{user_id} connected, audio mode: {is_audio}")
+    if protocol not in PROTOCOLS:
+        await websocket.close(code=1008, reason=f"Protocol not supported: {protocol}")
+        return
+    if audio_frame_ms not in SUPPORTED_FRAME_MS:
+        await websocket.close(code=1008, reason=f"Audio frame size not supported: {audio_frame_ms}ms")
+        return
+    if audio_codec not in available_codecs():
+        await websocket.close(code=1008, reason=f"Audio codec not supported: {audio_codec}")
+        return
 
+    await websocket.accept()
     user_id_str = str(user_id)
-    live_events, live_request_queue = await start_agent_session(user_id_str, is_audio == "true")
+    # One live session per user, here or on a multiplexed channel
+    if user_id_str in live_users:
+        await websocket.close(code=1008, reason="User already connected")
+        return
+    live_users.add(user_id_str)
+    logger.info(
+        "Client #%s connected, audio mode: %s, protocol: %s, audio frame: %sms, codec: %s",
+        user_id, is_audio, protocol, audio_frame_ms, audio_codec,
+        extra={"session": user_id},
+    )
+
+    try:
+        live_events, live_request_queue, session_id = await start_agent_session(user_id_str, is_audio == "true")
+    except Exception:
+        live_users.discard(user_id_str)
+        raise
+
+    # Bounded queue between the live events and the (possibly slow) client
+    outbound = OutboundQueue(
+        max_messages=OUTBOUND_QUEUE_MAX_MESSAGES,
+        max_bytes=OUTBOUND_QUEUE_MAX_BYTES,
+        policy=OUTBOUND_QUEUE_POLICY,
+    )
+    outbound_queues[user_id_str] = outbound
+
+    # Sampled per-message logging and rate counters for this connection
+    session_log = SessionLog(logger, user_id_str)
+    metrics = SessionMetrics(live_request_queue, outbound)
+    session_metrics[user_id_str] = metrics
+    codec = create_codec(audio_codec)
+
+    # Speculative turn pre-warming, for voice sessions only
+    prewarmer = None
+    if SPECULATIVE_PREWARM and is_audio == "true":
+        prefetcher = tool_prefetchers[session_id] = ToolPrefetcher()
+        prewarmer = SpeculativePrewarmer(
+            lambda transcript: prewarm_turn(prefetcher, transcript),
+            prefetcher,
+            debounce_ms=SPECULATIVE_PREWARM_DEBOUNCE_MS,
+        )
 
     # Run bidirectional messaging concurrently
     agent_to_client_task = asyncio.create_task(
-        agent_to_client_messaging(websocket, live_events)
+        agent_to_client_messaging(live_events, outbound, metrics, prewarmer)
+    )
+    outbound_task = asyncio.create_task(
+        send_outbound_messages(websocket, outbound, session_log, metrics, protocol, codec=codec)
     )
     client_to_agent_task = asyncio.create_task(
-        client_to_agent_messaging(websocket, live_request_queue)
+        client_to_agent_messaging(websocket, live_request_queue, session_log, metrics, audio_frame_ms, codec)
     )
 
     try:
-        # Wait for either task to complete (connection close or error)
-        tasks = [agent_to_client_task, client_to_agent_task]
-        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        # Wait for the connection to end: the sender finishes once the agent
+        # side is drained or the client is gone, the receiver on disconnect,
+        # and the agent side fails fast on outbound overflow
+        tasks = [agent_to_client_task, outbound_task, client_to_agent_task]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        if done == {agent_to_client_task} and agent_to_client_task.exception() is None:
+            # The agent side ended normally, let the sender drain the queue
+            more_done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            done |= more_done
+        for task in pending:
+            task.cancel()
 
         # Check for errors in completed tasks
         for task in done:
             if task.exception() is not None:
-                print(f"Task error for client #{user_id}: {task.exception()}")
-                import traceback
-                traceback.print_exception(type(task.exception()), task.exception(), task.exception().__traceback__)
+                if isinstance(task.exception(), OutboundOverflow):
+                    logger.warning("Closing client #%s: %s", user_id, task.exception())
+                    await websocket.close(code=1013, reason="Outbound queue overflow")
+                    continue
+                logger.error(
+                    "Task error for client #%s", user_id,
+                    exc_info=task.exception(),
+                )
     finally:
         # Clean up resources (always runs, even if asyncio.wait fails)
         live_request_queue.close()
-        print(f"Client #{user_id} disconnected")
+        outbound_queues.pop(user_id_str, None)
+        session_metrics.pop(user_id_str, None)
+        await session_reaper.detach(user_id_str)
+        live_users.discard(user_id_str)
+        session_log.summary()
+        if prewarmer:
+            prewarmer.close()
+            tool_prefetchers.pop(session_id, None)
+            logger.info("Prewarm stats", extra={"session": user_id, "stats": prewarmer.stats()})
+        logger.info("Client #%s disconnected", user_id, extra={"session": user_id})
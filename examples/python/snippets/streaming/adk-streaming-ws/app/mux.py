@@ -0,0 +1,93 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Many user sessions over one WebSocket connection.
+
+A gateway opens a single connection to `/ws/mux` and manages channels on it
+with JSON control messages:
+
+    {"channel": 42, "type": "open", "user_id": "1234", "is_audio": true}
+    {"channel": 42, "type": "close"}
+
+Each channel is a session of the given user, with its own LiveRequestQueue
+and outbound queue; a user can only have one live session at a time,
+whether multiplexed or on /ws/{user_id}. Channel ids are chosen by the
+gateway, unique on its connection, and in the uint32 range addressable by
+binary frames. Data messages are the usual JSON messages plus a "channel"
+field, or binary frames with the multiplexed header (see frames.py). The
+server sends {"channel": 42, "type": "closed", "reason": ...} when a
+channel ends.
+"""
+
+import asyncio
+from dataclasses import dataclass
+
+# Channel control message types
+MUX_OPEN = "open"
+MUX_CLOSE = "close"
+MUX_CLOSED = "closed"
+
+# Channel ids are uint32, the size of the binary frame header field
+MAX_CHANNEL_ID = 0xFFFFFFFF
+
+
+def parse_channel_id(value):
+    """Returns a JSON channel id, ValueError unless it is an int in the uint32 range"""
+    if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= MAX_CHANNEL_ID:
+        raise ValueError(f"Invalid channel id: {value!r}")
+    return value
+
+
+def parse_user_id(value):
+    """Returns the user id of an open message as a string, ValueError if missing or invalid"""
+    if isinstance(value, bool) or not isinstance(value, (str, int)) or value == "":
+        raise ValueError(f"Invalid user id: {value!r}")
+    return str(value)
+
+
+def channel_key(websocket, channel_id):
+    """Key of a channel in the app-wide registries, unique across connections"""
+    return f"mux-{id(websocket)}-{channel_id}"
+
+
+class SerializedWebSocket:
+    """Serializes sends from the per-channel senders onto one WebSocket"""
+
+    def __init__(self, websocket):
+        self._websocket = websocket
+        self._lock = asyncio.Lock()
+
+    async def send_text(self, data):
+        async with self._lock:
+            await self._websocket.send_text(data)
+
+    async def send_bytes(self, data):
+        async with self._lock:
+            await self._websocket.send_bytes(data)
+
+
+@dataclass
+class MuxChannel:
+    """State of one user session multiplexed over the connection"""
+    user_id: str
+    # Key in the app-wide registries (see channel_key)
+    key: str
+    live_request_queue: object
+    audio_coalescer: object
+    session_log: object
+    metrics: object
+    # Audio codec negotiated for the connection, one instance per channel
+    codec: object
+    # Runs the channel until it ends or is closed (see run_mux_channel)
+    task: asyncio.Task = None
@@ -0,0 +1,189 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bounded per-connection outbound queue.
+
+The live event loop puts messages here without waiting on the socket, and a
+separate sender task drains the queue. When a slow client lets the queue fill
+up, the overflow policy decides what happens:
+
+- "drop_partial_text": drop the oldest partial text, then the oldest audio
+- "coalesce_audio": merge new audio into the last queued audio message, then
+  drop the oldest audio if the byte limit is still exceeded
+- "disconnect": raise OutboundOverflow so the connection can be closed
+
+A single message larger than the byte limit can never fit, so it is dropped
+on arrival, or raises OutboundOverflow with the "disconnect" policy. Control
+messages (turn_complete, interrupted) are never dropped and do not count
+against the limits, so they are delivered as soon as the client reads.
+"""
+
+import asyncio
+from collections import deque
+
+# Message kinds
+KIND_AUDIO = "audio"
+KIND_TEXT = "text"
+KIND_CONTROL = "control"
+
+# Overflow policies
+POLICY_DROP_PARTIAL_TEXT = "drop_partial_text"
+POLICY_COALESCE_AUDIO = "coalesce_audio"
+POLICY_DISCONNECT = "disconnect"
+POLICIES = (POLICY_DROP_PARTIAL_TEXT, POLICY_COALESCE_AUDIO, POLICY_DISCONNECT)
+
+
+class OutboundOverflow(Exception):
+    """Raised by OutboundQueue.put() on overflow with the "disconnect" policy"""
+
+
+class OutboundQueue:
+    """Bounded queue of (kind, data) messages waiting to be sent to one client
+
+    `data` is the raw audio bytes for KIND_AUDIO and a JSON-serializable dict
+    otherwise.
+    """
+
+    def __init__(self, max_messages=256, max_bytes=1024 * 1024, policy=POLICY_DROP_PARTIAL_TEXT):
+        if policy not in POLICIES:
+            raise ValueError(f"Outbound queue policy not supported: {policy}")
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._messages = deque()
+        self._data_messages = 0
+        self._bytes = 0
+        self._ready = asyncio.Event()
+        self._closed = False
+        # Metrics
+        self.max_depth = 0
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, kind, data):
+        """Queues a message without blocking, applying the overflow policy"""
+        if self._closed:
+            return
+        if kind == KIND_CONTROL:
+            self._append(kind, data)
+            return
+
+        size = _size(kind, data)
+        if size > self.max_bytes:
+            # Evicting everything else would still leave the queue over its
+            # byte limit, so the message itself is the overflow
+            if self.policy == POLICY_DISCONNECT:
+                raise OutboundOverflow(
+                    f"Outbound message of {size} bytes exceeds the {self.max_bytes} byte limit"
+                )
+            self.dropped += 1
+            return
+        if self._overflows(1, size):
+            if self.policy == POLICY_DISCONNECT:
+                raise OutboundOverflow(
+                    f"Outbound queue full: {self._data_messages} messages, {self._bytes} bytes"
+                )
+            if self.policy == POLICY_COALESCE_AUDIO and kind == KIND_AUDIO and self._coalesce(data):
+                self._drop_oldest_while_over(KIND_AUDIO, 0, 0)
+                return
+            self._drop_oldest_while_over(KIND_TEXT, 1, size)
+            self._drop_oldest_while_over(KIND_AUDIO, 1, size)
+
+        self._append(kind, data)
+
+    def discard(self, kind):
+        """Drops every queued message of the given kind, e.g. audio on interruption"""
+        kept = deque()
+        for message in self._messages:
+            if message[0] == kind:
+                self._data_messages -= 1
+                self._bytes -= _size(*message)
+                self.dropped += 1
+            else:
+                kept.append(message)
+        self._messages = kept
+
+    async def get(self):
+        """Returns the next (kind, data) message, or None once closed and drained"""
+        while not self._messages:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        kind, data = self._messages.popleft()
+        if kind != KIND_CONTROL:
+            self._data_messages -= 1
+            self._bytes -= _size(kind, data)
+        self.sent += 1
+        return kind, data
+
+    def close(self):
+        """Stops accepting messages; get() returns None after the queue drains"""
+        self._closed = True
+        self._ready.set()
+
+    def stats(self):
+        """Returns queue depth and drop/coalesce counters"""
+        return {
+            "depth": len(self._messages),
+            "bytes": self._bytes,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "policy": self.policy,
+        }
+
+    def _append(self, kind, data):
+        self._messages.append((kind, data))
+        if kind != KIND_CONTROL:
+            self._data_messages += 1
+            self._bytes += _size(kind, data)
+        self.max_depth = max(self.max_depth, len(self._messages))
+        self._ready.set()
+
+    def _overflows(self, incoming_messages, incoming_bytes):
+        return (
+            self._data_messages + incoming_messages > self.max_messages
+            or self._bytes + incoming_bytes > self.max_bytes
+        )
+
+    def _coalesce(self, data):
+        # Only merge into the tail, so audio stays in order relative to other messages
+        if not self._messages or self._messages[-1][0] != KIND_AUDIO:
+            return False
+        _, tail = self._messages.pop()
+        self._messages.append((KIND_AUDIO, tail + data))
+        self._bytes += len(data)
+        self.coalesced += 1
+        return True
+
+    def _drop_oldest_while_over(self, kind, incoming_messages, incoming_bytes):
+        for message in list(self._messages):
+            if not self._overflows(incoming_messages, incoming_bytes):
+                return
+            if message[0] == kind:
+                self._messages.remove(message)
+                self._data_messages -= 1
+                self._bytes -= _size(*message)
+                self.dropped += 1
+
+
+def _size(kind, data):
+    if kind == KIND_AUDIO:
+        return len(data)
+    if kind == KIND_TEXT:
+        return len(data["data"])
+    return 0
@@ -0,0 +1,164 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Speculative turn pre-warming on partial input transcription.
+
+In BIDI mode the model only answers once the user's turn ends, and then
+waits for each function tool it calls. With input transcription enabled,
+SpeculativePrewarmer watches the transcript while the user is still speaking
+and, once it has been stable for `debounce_ms`, runs `prewarm(transcript)`.
+That work starts tool calls the turn is likely to make on a ToolPrefetcher;
+a tool wrapped with prefetched_tool() then awaits the prefetched call with
+the same arguments instead of starting its own. Barge-in
+(`event.interrupted`) and the end of the turn discard what wasn't used.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+
+from google.adk.tools.tool_context import ToolContext
+
+logger = logging.getLogger(__name__)
+
+
+def _call_key(func, kwargs):
+    # The model and the transcript may differ in case and spacing
+    normalized = {
+        name: value.strip().casefold() if isinstance(value, str) else value
+        for name, value in kwargs.items()
+    }
+    return json.dumps([func.__name__, normalized], sort_keys=True, default=str)
+
+
+class ToolPrefetcher:
+    """Speculative tool calls of one live session, keyed by tool and arguments"""
+
+    def __init__(self):
+        self._calls = {}
+        self.prefetched = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def start(self, func, **kwargs):
+        """Starts `func(**kwargs)` in the background, unless already started"""
+        key = _call_key(func, kwargs)
+        if key not in self._calls:
+            self._calls[key] = asyncio.create_task(func(**kwargs))
+            self.prefetched += 1
+
+    async def call(self, func, **kwargs):
+        """Returns the prefetched result of `func(**kwargs)`, or calls it"""
+        task = self._calls.pop(_call_key(func, kwargs), None)
+        if task is None or task.cancelled():
+            self.misses += 1
+            return await func(**kwargs)
+        self.hits += 1
+        return await task
+
+    def discard(self):
+        """Cancels the prefetched calls no tool has used"""
+        for task in self._calls.values():
+            task.cancel()
+        self.discarded += len(self._calls)
+        self._calls.clear()
+
+    def stats(self):
+        return {
+            "prefetched": self.prefetched,
+            "hits": self.hits,
+            "misses": self.misses,
+            "discarded": self.discarded,
+        }
+
+
+def prefetched_tool(func, prefetchers):
+    """
+    Wraps an async function tool so its calls use the prefetched results of
+    the session's ToolPrefetcher (`prefetchers` maps session ids to them).
+    The model sees the same declaration as for `func`.
+    """
+
+    @functools.wraps(func)
+    async def tool(tool_context: ToolContext, **kwargs):
+        prefetcher = prefetchers.get(tool_context.session.id)
+        if prefetcher is None:
+            return await func(**kwargs)
+        return await prefetcher.call(func, **kwargs)
+
+    # ADK reads the tool's parameters from its signature, and passes
+    # tool_context when the signature has it
+    signature = inspect.signature(func)
+    tool.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("tool_context", inspect.Parameter.KEYWORD_ONLY, annotation=ToolContext),
+    ])
+    return tool
+
+
+class SpeculativePrewarmer:
+    """Runs `prewarm(transcript)` speculatively for the turn being spoken"""
+
+    def __init__(self, prewarm, prefetcher, debounce_ms=300, min_chars=8):
+        self._prewarm = prewarm
+        self._prefetcher = prefetcher
+        self._debounce = debounce_ms / 1000
+        self._min_chars = min_chars
+        self._transcript = ""
+        self._task = None
+        self.runs = 0
+
+    def on_transcription(self, text):
+        """Adds input transcription text and reschedules the prewarm work"""
+        self._transcript += text
+        transcript = self._transcript.strip()
+        if len(transcript) < self._min_chars:
+            return
+        self._cancel()
+        self._task = asyncio.create_task(self._run(transcript))
+
+    def on_interrupted(self):
+        """Drops the speculative work when the user barges in"""
+        self.on_turn_complete()
+
+    def on_turn_complete(self):
+        """Ends the turn; prefetched calls not used by now are stale"""
+        self._cancel()
+        self._prefetcher.discard()
+        self._transcript = ""
+
+    def close(self):
+        self._cancel()
+        self._prefetcher.discard()
+
+    def stats(self):
+        """Returns the prewarm runs and the prefetcher's counters"""
+        return {"runs": self.runs, **self._prefetcher.stats()}
+
+    async def _run(self, transcript):
+        # Wait for the transcript to settle before doing any work
+        await asyncio.sleep(self._debounce)
+        self.runs += 1
+        try:
+            await self._prewarm(transcript)
+        except Exception:
+            logger.exception("Speculative prewarm failed")
+
+    def _cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
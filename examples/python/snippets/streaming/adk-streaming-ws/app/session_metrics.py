@@ -0,0 +1,165 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-session resource accounting, exposed in the Prometheus text format.
+
+SessionMetrics is updated from the messaging loops of one WebSocket session:
+bytes and messages in/out, live events, audio seconds, time to first token
+after each send_content(), and queue depths. render_prometheus() renders the
+metrics of all connected sessions for a `/metrics` scrape.
+"""
+
+import time
+from collections import deque
+
+# Bytes per second of PCM audio: 16kHz 16-bit input, 24kHz 16-bit output
+INPUT_AUDIO_BYTES_PER_SECOND = 16000 * 2
+OUTPUT_AUDIO_BYTES_PER_SECOND = 24000 * 2
+
+# Window used for the events-per-second gauge
+RATE_WINDOW_SECONDS = 10
+
+DIRECTIONS = ("in", "out")
+
+
+class SessionMetrics:
+    """Counters and gauges of one live streaming session"""
+
+    def __init__(self, live_request_queue, outbound):
+        self._live_request_queue = live_request_queue
+        self._outbound = outbound
+        self.started = time.monotonic()
+        self.bytes = dict.fromkeys(DIRECTIONS, 0)
+        self.messages = dict.fromkeys(DIRECTIONS, 0)
+        self.audio_seconds = dict.fromkeys(DIRECTIONS, 0.0)
+        self.live_events = 0
+        # [second, events] buckets for the events-per-second gauge
+        self._event_buckets = deque(maxlen=RATE_WINDOW_SECONDS)
+        # Time to first token after send_content()
+        self._turn_sent_at = None
+        self.ttft_sum = 0.0
+        self.ttft_count = 0
+        self.ttft_last = None
+
+    def on_client_message(self, size, audio_bytes=0):
+        """Records a message received from the client"""
+        self.messages["in"] += 1
+        self.bytes["in"] += size
+        self.audio_seconds["in"] += audio_bytes / INPUT_AUDIO_BYTES_PER_SECOND
+
+    def on_client_message_sent(self, size, audio_bytes=0):
+        """Records a message sent to the client"""
+        self.messages["out"] += 1
+        self.bytes["out"] += size
+        self.audio_seconds["out"] += audio_bytes / OUTPUT_AUDIO_BYTES_PER_SECOND
+
+    def on_send_content(self):
+        """Starts the time-to-first-token clock for a text turn"""
+        self._turn_sent_at = time.monotonic()
+
+    def on_live_event(self, has_output):
+        """Records a live event; `has_output` marks text, audio or transcript"""
+        self.live_events += 1
+        second = int(time.monotonic())
+        if self._event_buckets and self._event_buckets[-1][0] == second:
+            self._event_buckets[-1][1] += 1
+        else:
+            self._event_buckets.append([second, 1])
+
+        if has_output and self._turn_sent_at is not None:
+            self.ttft_last = time.monotonic() - self._turn_sent_at
+            self.ttft_sum += self.ttft_last
+            self.ttft_count += 1
+            self._turn_sent_at = None
+
+    def events_per_second(self):
+        since = int(time.monotonic()) - RATE_WINDOW_SECONDS
+        return sum(events for second, events in self._event_buckets if second > since) / RATE_WINDOW_SECONDS
+
+    def live_queue_depth(self):
+        # LiveRequestQueue has no public size; it wraps an asyncio.Queue
+        return self._live_request_queue._queue.qsize()
+
+    def outbound_queue_depth(self):
+        return self._outbound.stats()["depth"]
+
+
+# name -> (type, help, function returning [(labels, value)] for one session)
+_METRICS = {
+    "adk_streaming_bytes_total": (
+        "counter", "WebSocket payload bytes by direction",
+        lambda m: [({"direction": d}, m.bytes[d]) for d in DIRECTIONS],
+    ),
+    "adk_streaming_messages_total": (
+        "counter", "WebSocket messages by direction",
+        lambda m: [({"direction": d}, m.messages[d]) for d in DIRECTIONS],
+    ),
+    "adk_streaming_audio_seconds_total": (
+        "counter", "Seconds of PCM audio by direction",
+        lambda m: [({"direction": d}, round(m.audio_seconds[d], 3)) for d in DIRECTIONS],
+    ),
+    "adk_streaming_live_events_total": (
+        "counter", "Events received from run_live",
+        lambda m: [({}, m.live_events)],
+    ),
+    "adk_streaming_live_events_per_second": (
+        "gauge", f"Live events per second over the last {RATE_WINDOW_SECONDS}s",
+        lambda m: [({}, m.events_per_second())],
+    ),
+    "adk_streaming_time_to_first_token_seconds": (
+        "summary", "Time from send_content() to the first text, audio or transcript",
+        lambda m: [({"__suffix": "_sum"}, round(m.ttft_sum, 4)), ({"__suffix": "_count"}, m.ttft_count)],
+    ),
+    "adk_streaming_time_to_first_token_last_seconds": (
+        "gauge", "Time to first token of the latest turn",
+        lambda m: [({}, round(m.ttft_last, 4))] if m.ttft_last is not None else [],
+    ),
+    "adk_streaming_live_request_queue_depth": (
+        "gauge", "Requests waiting in the LiveRequestQueue",
+        lambda m: [({}, m.live_queue_depth())],
+    ),
+    "adk_streaming_outbound_queue_depth": (
+        "gauge", "Messages waiting in the outbound queue",
+        lambda m: [({}, m.outbound_queue_depth())],
+    ),
+    "adk_streaming_session_uptime_seconds": (
+        "gauge", "Seconds since the session connected",
+        lambda m: [({}, round(time.monotonic() - m.started, 1))],
+    ),
+}
+
+
+def escape_label_value(value):
+    """Escapes a label value as the Prometheus text format requires"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(sessions):
+    """Renders {session id: SessionMetrics} in the Prometheus text format"""
+    lines = [
+        "# HELP adk_streaming_active_sessions Connected WebSocket sessions",
+        "# TYPE adk_streaming_active_sessions gauge",
+        f"adk_streaming_active_sessions {len(sessions)}",
+    ]
+    for name, (metric_type, help_text, samples) in _METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for session_id, metrics in sessions.items():
+            for labels, value in samples(metrics):
+                suffix = labels.pop("__suffix", "")
+                label_text = ",".join(
+                    f'{key}="{escape_label_value(label)}"' for key, label in {"session": session_id, **labels}.items()
+                )
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
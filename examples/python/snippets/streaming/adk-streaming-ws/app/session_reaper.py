@@ -0,0 +1,171 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Background reaper that bounds the sessions kept by the session service.
+
+Sessions stay in the InMemorySessionService after their client disconnects,
+so returning users keep their history. SessionReaper tracks them and
+periodically deletes idle sessions older than `idle_ttl_seconds`, then evicts
+the least recently used idle sessions while there are more than
+`max_sessions` or their event histories take more than `max_bytes`.
+Sessions with a connected client are never evicted.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrackedSession:
+    """Usage of one session in the session service"""
+    session_id: str
+    in_use: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    # Serialized size of the session, measured when its last client leaves
+    size_bytes: int = 0
+
+
+class SessionReaper:
+    """Evicts idle sessions by TTL, then LRU down to the count and byte ceilings"""
+
+    def __init__(
+        self,
+        session_service,
+        app_name,
+        idle_ttl_seconds=1800,
+        max_sessions=1000,
+        max_bytes=256 * 1024 * 1024,
+        interval_seconds=60,
+    ):
+        self._session_service = session_service
+        self._app_name = app_name
+        self._idle_ttl_seconds = idle_ttl_seconds
+        self._max_sessions = max_sessions
+        self._max_bytes = max_bytes
+        self._interval_seconds = interval_seconds
+        # user_id -> TrackedSession, least recently used first
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._task = None
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def start(self):
+        """Starts the periodic reaper task"""
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stops the reaper task"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def attach(self, user_id, session_id):
+        """Marks the user's session as in use by a connected client"""
+        entry = self._sessions.get(user_id)
+        if entry is None or entry.session_id != session_id:
+            entry = TrackedSession(session_id=session_id)
+            self._sessions[user_id] = entry
+        self._sessions.move_to_end(user_id)
+        entry.in_use += 1
+        entry.last_used = time.monotonic()
+
+    async def detach(self, user_id):
+        """Marks the user's session as idle and records its size"""
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            return
+        entry.in_use = max(0, entry.in_use - 1)
+        entry.last_used = time.monotonic()
+        if entry.in_use:
+            return
+
+        # Histories only grow while a client is connected, so measure them once here
+        session = await self._session_service.get_session(
+            app_name=self._app_name,
+            user_id=user_id,
+            session_id=entry.session_id,
+        )
+        size_bytes = len(session.model_dump_json()) if session else 0
+        self._bytes += size_bytes - entry.size_bytes
+        entry.size_bytes = size_bytes
+
+    async def reap(self):
+        """Evicts expired idle sessions, then idle ones over the ceilings"""
+        now = time.monotonic()
+        expired = [
+            user_id for user_id, entry in self._sessions.items()
+            if not entry.in_use and now - entry.last_used > self._idle_ttl_seconds
+        ]
+        for user_id in expired:
+            await self._evict(user_id, "idle_ttl")
+
+        # Oldest entries come first in the OrderedDict
+        for user_id in list(self._sessions):
+            if len(self._sessions) > self._max_sessions:
+                reason = "max_sessions"
+            elif self._bytes > self._max_bytes:
+                reason = "max_bytes"
+            else:
+                break
+            if not self._sessions[user_id].in_use:
+                await self._evict(user_id, reason)
+
+    def stats(self):
+        """Returns tracked session count, bytes and eviction counters"""
+        return {
+            "sessions": len(self._sessions),
+            "in_use": sum(1 for entry in self._sessions.values() if entry.in_use),
+            "bytes": self._bytes,
+            "max_sessions": self._max_sessions,
+            "max_bytes": self._max_bytes,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval_seconds)
+            try:
+                await self.reap()
+            except Exception:
+                logger.exception("Session reaper failed")
+
+    async def _evict(self, user_id, reason):
+        entry = self._sessions.pop(user_id)
+        self._bytes -= entry.size_bytes
+        self.evictions += 1
+        self.evicted_bytes += entry.size_bytes
+        await self._session_service.delete_session(
+            app_name=self._app_name,
+            user_id=user_id,
+            session_id=entry.session_id,
+        )
+        logger.info(
+            "Evicted session %s (%s)", entry.session_id, reason,
+            extra={
+                "session": user_id,
+                "size": entry.size_bytes,
+                "stats": {
+                    "reason": reason,
+                    "idle_seconds": round(time.monotonic() - entry.last_used, 1),
+                },
+            },
+        )
@@ -29,6 +29,14 @@ const ws_url =
 let websocket = null;
 let is_audio = false;
 
+// Exchange audio as binary frames: a 1-byte frame type followed by raw PCM.
+// JSON text frames are only used for text and control messages.
+const protocol = "binary";
+const FRAME_AUDIO_PCM = 0x01;
+
+// Duration of the audio frames the server forwards to the model (20, 40 or 100ms)
+const audio_frame_ms = 40;
+
 // Get DOM elements
 const messageForm = document.getElementById("messageForm");
 const messageInput = document.getElementById("message");
@@ -38,7 +46,13 @@ let currentMessageId = null;
 // WebSocket handlers
 function connectWebsocket() {
   // Connect websocket
-  websocket = new WebSocket(ws_url + "?is_audio=" + is_audio);
+  websocket = new WebSocket(
+    ws_url +
+      "?is_audio=" + is_audio +
+      "&protocol=" + protocol +
+      "&audio_frame_ms=" + audio_frame_ms
+  );
+  websocket.binaryType = "arraybuffer";
 
   // Handle connection open
   websocket.onopen = function () {
@@ -53,6 +67,15 @@ function connectWebsocket() {
 
   // Handle incoming messages
   websocket.onmessage = function (event) {
+    // Binary frames carry raw audio, play it
+    if (event.data instanceof ArrayBuffer) {
+      const frameType = new Uint8Array(event.data, 0, 1)[0];
+      if (frameType == FRAME_AUDIO_PCM && audioPlayerNode) {
+        audioPlayerNode.port.postMessage(event.data.slice(1));
+      }
+      return;
+    }
+
     // Parse the incoming message
     const message_from_server = JSON.parse(event.data);
     console.log("[AGENT TO CLIENT] ", message_from_server);
@@ -149,6 +172,16 @@ function sendMessage(message) {
   }
 }
 
+// Send raw audio as a binary frame
+function sendAudioFrame(pcmData) {
+  if (websocket && websocket.readyState == WebSocket.OPEN) {
+    const frame = new Uint8Array(1 + pcmData.byteLength);
+    frame[0] = FRAME_AUDIO_PCM;
+    frame.set(new Uint8Array(pcmData), 1);
+    websocket.send(frame.buffer);
+  }
+}
+
 // Decode Base64 data to Array
 function base64ToArray(base64) {
   const binaryString = window.atob(base64);
@@ -203,11 +236,15 @@ startAudioButton.addEventListener("click", () => {
 
 // Audio recorder handler
 function audioRecorderHandler(pcmData) {
-  // Send the pcm data as base64
-  sendMessage({
-    mime_type: "audio/pcm",
-    data: arrayBufferToBase64(pcmData),
-  });
+  // Send the pcm data as a binary frame, or as base64 in JSON mode
+  if (protocol == "binary") {
+    sendAudioFrame(pcmData);
+  } else {
+    sendMessage({
+      mime_type: "audio/pcm",
+      data: arrayBufferToBase64(pcmData),
+    });
+  }
   console.log("[CLIENT TO AGENT] sent %s bytes", pcmData.byteLength);
 }
 
@@ -0,0 +1,92 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the overflow policies of OutboundQueue"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app modules import each other by their top-level names
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from outbound import (  # noqa: E402
+    KIND_AUDIO,
+    KIND_CONTROL,
+    KIND_TEXT,
+    POLICIES,
+    POLICY_COALESCE_AUDIO,
+    POLICY_DISCONNECT,
+    POLICY_DROP_PARTIAL_TEXT,
+    OutboundOverflow,
+    OutboundQueue,
+)
+
+
+def text(data):
+    return {"mime_type": "text/plain", "data": data, "partial": True}
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_messages_within_limits_are_queued_in_order(policy):
+    queue = OutboundQueue(max_messages=4, max_bytes=100, policy=policy)
+    queue.put(KIND_TEXT, text("hello"))
+    queue.put(KIND_CONTROL, {"turn_complete": True})
+    queue.put(KIND_AUDIO, b"\x00" * 10)
+
+    assert [message[0] for message in queue._messages] == [KIND_TEXT, KIND_CONTROL, KIND_AUDIO]
+    assert queue.stats()["bytes"] == 15
+
+
+def test_drop_partial_text_drops_oldest_text_first():
+    queue = OutboundQueue(max_messages=2, max_bytes=100, policy=POLICY_DROP_PARTIAL_TEXT)
+    queue.put(KIND_AUDIO, b"\x00" * 10)
+    queue.put(KIND_TEXT, text("old"))
+    queue.put(KIND_TEXT, text("new"))
+
+    assert list(queue._messages) == [(KIND_AUDIO, b"\x00" * 10), (KIND_TEXT, text("new"))]
+    assert queue.dropped == 1
+
+
+@pytest.mark.parametrize("policy", [POLICY_DROP_PARTIAL_TEXT, POLICY_COALESCE_AUDIO])
+@pytest.mark.parametrize("kind, data", [(KIND_AUDIO, b"\x00" * 101), (KIND_TEXT, text("x" * 101))])
+def test_oversize_message_is_dropped_without_evicting_the_queue(policy, kind, data):
+    queue = OutboundQueue(max_messages=8, max_bytes=100, policy=policy)
+    queue.put(KIND_AUDIO, b"\x00" * 40)
+    queue.put(KIND_TEXT, text("hello"))
+
+    queue.put(kind, data)
+
+    stats = queue.stats()
+    assert stats["depth"] == 2
+    assert stats["bytes"] == 45
+    assert stats["dropped"] == 1
+
+
+def test_oversize_message_disconnects_with_disconnect_policy():
+    queue = OutboundQueue(max_messages=8, max_bytes=100, policy=POLICY_DISCONNECT)
+    queue.put(KIND_TEXT, text("hello"))
+
+    with pytest.raises(OutboundOverflow):
+        queue.put(KIND_AUDIO, b"\x00" * 101)
+    assert queue.stats()["depth"] == 1
+
+
+def test_oversize_control_message_is_queued():
+    queue = OutboundQueue(max_messages=1, max_bytes=10, policy=POLICY_DROP_PARTIAL_TEXT)
+    queue.put(KIND_CONTROL, {"interrupted": True, "detail": "x" * 100})
+
+    assert queue.stats()["depth"] == 1
+    assert queue.stats()["bytes"] == 0
@@ -15,8 +15,11 @@
 import os
 import json
 import base64
+import logging
 import warnings
 
+from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -37,6 +40,10 @@ from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from google_search_agent.agent import root_agent
+from resumable_stream import ResumableStream
+from session_pool import SessionPool
+from session_registry import create_session_registry
+from streaming_logging import SessionLog, setup_logging
 
 warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 
@@ -47,29 +54,74 @@ warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 # Load Gemini API Key
 load_dotenv()
 
+# Queued, structured logging keeps stdout I/O off the event loop
+setup_logging(os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
 APP_NAME = "ADK Streaming example"
 
+# Session pool limits
+SESSION_POOL_MAX_SESSIONS = int(os.getenv("SESSION_POOL_MAX_SESSIONS", "1000"))
+SESSION_POOL_TTL_SECONDS = float(os.getenv("SESSION_POOL_TTL_SECONDS", "1800"))
+
+# Session registry: "inprocess" for a single worker, "unix" to route
+# /send requests between several workers on one host
+SESSION_REGISTRY = os.getenv("SESSION_REGISTRY", "inprocess")
+SESSION_REGISTRY_DIR = os.getenv("SESSION_REGISTRY_DIR", "/tmp/adk-streaming-registry")
+
+# Resumable SSE streams: events kept for replay, and how long a live session
+# waits for its client to reconnect
+SSE_REPLAY_BUFFER_SIZE = int(os.getenv("SSE_REPLAY_BUFFER_SIZE", "256"))
+SSE_RESUME_GRACE_SECONDS = float(os.getenv("SSE_RESUME_GRACE_SECONDS", "30"))
+
+# Create a process-wide Runner, shared by all connections
+runner = InMemoryRunner(
+    app_name=APP_NAME,
+    agent=root_agent,
+)
+
+# ADK keeps the live session resumption handle on the agent's invocation
+# context and doesn't yield the updates as events: remember that context per
+# session, so the handle can be saved when the live session ends
+live_invocations = {}
+
+
+def remember_live_invocation(callback_context):
+    """before_agent_callback capturing the invocation context of live runs"""
+    invocation_context = callback_context._invocation_context
+    if invocation_context.live_request_queue:
+        live_invocations[invocation_context.session.id] = invocation_context
+    return None
+
+
+existing_callbacks = root_agent.before_agent_callback or []
+if not isinstance(existing_callbacks, list):
+    existing_callbacks = [existing_callbacks]
+root_agent.before_agent_callback = [*existing_callbacks, remember_live_invocation]
+
+# Pool of sessions keyed by user, so returning users skip session setup
+session_pool = SessionPool(
+    runner.session_service,
+    APP_NAME,
+    max_sessions=SESSION_POOL_MAX_SESSIONS,
+    ttl_seconds=SESSION_POOL_TTL_SECONDS,
+)
+
 
 async def start_agent_session(user_id, is_audio=False):
     """Starts an agent session"""
 
-    # Create a Runner
-    runner = InMemoryRunner(
-        app_name=APP_NAME,
-        agent=root_agent,
-    )
-
-    # Create a Session
-    session = await runner.session_service.create_session(
-        app_name=APP_NAME,
-        user_id=user_id,  # Replace with actual user ID
-    )
+    # Get the pooled Session for this user (created on first connect)
+    pooled_session = await session_pool.acquire(user_id)
 
     # Set response modality
+    # Reuse the last resumption handle so the live session picks up where it left off
     modality = "AUDIO" if is_audio else "TEXT"
     run_config = RunConfig(
         response_modalities=[modality],
-        session_resumption=types.SessionResumptionConfig()
+        session_resumption=types.SessionResumptionConfig(
+            handle=pooled_session.resumption_handle
+        )
     )
 
     # Create a LiveRequestQueue for this session
@@ -77,14 +129,14 @@ async def start_agent_session(user_id, is_audio=False):
 
     # Start agent session
     live_events = runner.run_live(
-        session=session,
+        session=pooled_session.session,
         live_request_queue=live_request_queue,
         run_config=run_config,
     )
-    return live_events, live_request_queue
+    return live_events, live_request_queue, pooled_session
 
 
-async def agent_to_client_sse(live_events):
+async def agent_to_client_sse(live_events, session_log):
     """Agent to client communication via SSE"""
     async for event in live_events:
         # If the turn complete or interrupted, send it
@@ -94,7 +146,7 @@ async def agent_to_client_sse(live_events):
                 "interrupted": event.interrupted,
             }
             yield f"data: {json.dumps(message)}\n\n"
-            print(f"[AGENT TO CLIENT]: {message}")
+            session_log.message("agent_to_client", "control", 0, detail=message)
             continue
 
         # Read the Content and its first Part
@@ -114,7 +166,7 @@ async def agent_to_client_sse(live_events):
                     "data": base64.b64encode(audio_data).decode("ascii")
                 }
                 yield f"data: {json.dumps(message)}\n\n"
-                print(f"[AGENT TO CLIENT]: audio/pcm: {len(audio_data)} bytes.")
+                session_log.message("agent_to_client", "audio/pcm", len(audio_data))
                 continue
 
         # If it's text and a partial text, send it
@@ -124,14 +176,45 @@ async def agent_to_client_sse(live_events):
                 "data": part.text
             }
             yield f"data: {json.dumps(message)}\n\n"
-            print(f"[AGENT TO CLIENT]: text/plain: {message}")
+            session_log.message("agent_to_client", "text/plain", len(part.text), detail=message)
+
+
+def deliver_client_message(live_request_queue, session_log, message):
+    """Client to agent communication, run by the worker that owns the session"""
+    mime_type = message["mime_type"]
+    data = message["data"]
+
+    # Send the message to the agent
+    if mime_type == "text/plain":
+        content = Content(role="user", parts=[Part.from_text(text=data)])
+        live_request_queue.send_content(content=content)
+        session_log.message("client_to_agent", mime_type, len(data), detail=data)
+    elif mime_type == "audio/pcm":
+        decoded_data = base64.b64decode(data)
+        live_request_queue.send_realtime(Blob(data=decoded_data, mime_type=mime_type))
+        session_log.message("client_to_agent", mime_type, len(decoded_data))
+    else:
+        return {"error": f"Mime type not supported: {mime_type}"}
+
+    return {"status": "sent"}
 
 
 #
 # FastAPI web app
 #
 
-app = FastAPI()
+# Registry of live sessions, shared by all workers when SESSION_REGISTRY=unix
+session_registry = create_session_registry(SESSION_REGISTRY, SESSION_REGISTRY_DIR)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await session_registry.start()
+    yield
+    await session_registry.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -144,43 +227,103 @@ app.add_middleware(
 STATIC_DIR = Path("static")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-# Store active sessions
-active_sessions = {}
-
-
 @app.get("/")
 async def root():
     """Serves the index.html"""
     return FileResponse(os.path.join(STATIC_DIR, "index.html"))
 
 
-@app.get("/events/{user_id}")
-async def sse_endpoint(user_id: int, is_audio: str = "false"):
-    """SSE endpoint for agent to client communication"""
+@app.get("/pool/stats")
+async def pool_stats_endpoint():
+    """Session pool size and hit/miss/eviction counters"""
+    return session_pool.stats()
 
-    # Start agent session
-    user_id_str = str(user_id)
-    live_events, live_request_queue = await start_agent_session(user_id_str, is_audio == "true")
 
-    # Store the request queue for this user
-    active_sessions[user_id_str] = live_request_queue
+# Live streams kept across client reconnects: user -> (stream, is_audio)
+live_streams = {}
 
-    print(f"Client #{user_id} connected via SSE, audio mode: {is_audio}")
 
-    def cleanup():
+async def open_live_stream(user_id, is_audio):
+    """Starts a live session and wraps its SSE messages in a ResumableStream"""
+    live_events, live_request_queue, pooled_session = await start_agent_session(
+        user_id, is_audio
+    )
+
+    # Sampled message logging and rate counters for this session
+    session_log = SessionLog(logger, user_id)
+
+    # Register this worker as the owner of the user's request queue
+    handler = partial(deliver_client_message, live_request_queue, session_log)
+    await session_registry.register(user_id, handler)
+
+    async def close_live_session():
         live_request_queue.close()
-        if user_id_str in active_sessions:
-            del active_sessions[user_id_str]
-        print(f"Client #{user_id} disconnected from SSE")
+        # Keep the latest resumption handle for the user's next connect
+        invocation_context = live_invocations.pop(pooled_session.session.id, None)
+        if invocation_context and invocation_context.live_session_resumption_handle:
+            pooled_session.resumption_handle = invocation_context.live_session_resumption_handle
+        await session_registry.unregister(user_id, handler)
+        session_pool.release(user_id)
+        if live_streams.get(user_id, (None,))[0] is stream:
+            del live_streams[user_id]
+        session_log.summary()
+        logger.info("Live session of client #%s closed", user_id, extra={"session": user_id})
+
+    stream = ResumableStream(
+        agent_to_client_sse(live_events, session_log),
+        close_live_session,
+        buffer_size=SSE_REPLAY_BUFFER_SIZE,
+        grace_seconds=SSE_RESUME_GRACE_SECONDS,
+    )
+    live_streams[user_id] = (stream, is_audio)
+    return stream
+
+
+@app.get("/events/{user_id}")
+async def sse_endpoint(
+    user_id: int,
+    request: Request,
+    is_audio: str = "false",
+    last_event_id: str = None,
+):
+    """SSE endpoint for agent to client communication
+
+    A client that reconnects with the Last-Event-ID header (or the
+    last_event_id query parameter) within SSE_RESUME_GRACE_SECONDS is
+    reattached to its live session, and only the events it missed are replayed.
+    Without such an ID, the client gets the live session's new events only.
+    """
+
+    user_id_str = str(user_id)
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+
+    # Reattach to the user's live stream, or start agent session
+    stream, stream_is_audio = live_streams.get(user_id_str, (None, None))
+    if stream and (stream.closed or stream_is_audio != (is_audio == "true")):
+        await stream.close()
+        stream = None
+    resumed = stream is not None
+    if not resumed:
+        stream = await open_live_stream(user_id_str, is_audio == "true")
+    cursor = stream.resume_cursor(last_event_id) if resumed else 0
+    if cursor is None:
+        # No ID of this stream: don't replay events sent to another connection
+        cursor = stream.tail_cursor()
+
+    logger.info(
+        "Client #%s connected via SSE, audio mode: %s, resumed: %s",
+        user_id, is_audio, resumed,
+        extra={"session": user_id_str},
+    )
 
     async def event_generator():
         try:
-            async for data in agent_to_client_sse(live_events):
+            async for data in stream.subscribe(cursor):
                 yield data
-        except Exception as e:
-            print(f"Error in SSE stream: {e}")
+        except Exception:
+            logger.exception("Error in SSE stream")
         finally:
-            cleanup()
+            logger.info("Client #%s disconnected from SSE", user_id, extra={"session": user_id_str})
 
     return StreamingResponse(
         event_generator(),
@@ -200,26 +343,11 @@ async def send_message_endpoint(user_id: int, request: Request):
 
     user_id_str = str(user_id)
 
-    # Get the live request queue for this user
-    live_request_queue = active_sessions.get(user_id_str)
-    if not live_request_queue:
-        return {"error": "Session not found"}
-
     # Parse the message
     message = await request.json()
-    mime_type = message["mime_type"]
-    data = message["data"]
 
-    # Send the message to the agent
-    if mime_type == "text/plain":
-        content = Content(role="user", parts=[Part.from_text(text=data)])
-        live_request_queue.send_content(content=content)
-        print(f"[CLIENT TO AGENT]: {data}")
-    elif mime_type == "audio/pcm":
-        decoded_data = base64.b64decode(data)
-        live_request_queue.send_realtime(Blob(data=decoded_data, mime_type=mime_type))
-        print(f"[CLIENT TO AGENT]: audio/pcm: {len(decoded_data)} bytes")
-    else:
-        return {"error": f"Mime type not supported: {mime_type}"}
-
-    return {"status": "sent"}
+    # Deliver it here or on the worker that owns the user's session
+    response = await session_registry.send(user_id_str, message)
+    if response is None:
+        return {"error": "Session not found"}
+    return response
@@ -0,0 +1,129 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""SSE streams that survive client reconnects.
+
+A ResumableStream consumes a live session's SSE messages in a background task
+and numbers them into a bounded ring buffer. Event IDs have the form
+"<token>:<n>", where the token identifies the stream. A client that
+reconnects with the last ID it saw (the Last-Event-ID header) is reattached
+to the same stream, and only the events it missed are replayed; other
+clients attaching to the stream start at its tail.
+
+When the last client disconnects, the stream is kept for `grace_seconds`.
+Once it expires, ends, or is closed, `on_close` is awaited (once) to release
+the live session.
+"""
+
+import asyncio
+import uuid
+from collections import deque
+from itertools import islice
+
+
+class ResumableStream:
+    """Ring-buffered SSE messages of one live session, replayable by event ID"""
+
+    def __init__(self, messages, on_close, buffer_size=256, grace_seconds=30.0):
+        self.token = uuid.uuid4().hex[:12]
+        self._on_close = on_close
+        self._grace_seconds = grace_seconds
+        self._buffer = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._changed = asyncio.Condition()
+        self._subscribers = 0
+        self._expiry = None
+        self.closed = False
+        self._pump_task = asyncio.create_task(self._pump(messages))
+
+    def resume_cursor(self, last_event_id):
+        """Returns the event number to replay after, None if the ID is not ours"""
+        token, _, number = (last_event_id or "").partition(":")
+        if token != self.token or not number.isdigit():
+            return None
+        # An ID ahead of the stream would make subscribe() skip the events up to it
+        return min(int(number), self._last_id)
+
+    def tail_cursor(self):
+        """Returns the cursor of the latest event, to receive only new ones"""
+        return self._last_id
+
+    async def subscribe(self, cursor=0):
+        """Yields SSE chunks after `cursor`: missed events first, then live ones"""
+        self._attach()
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self._last_id > cursor or self.closed)
+                    pending = self._events_after(cursor)
+                for number, chunk in pending:
+                    cursor = number
+                    yield f"id: {self.token}:{number}\n{chunk}"
+                if self.closed and cursor >= self._last_id:
+                    return
+        finally:
+            self._detach()
+
+    async def close(self):
+        """Stops the stream, wakes up subscribers and awaits `on_close` once"""
+        if self._expiry:
+            self._expiry.cancel()
+            self._expiry = None
+        self._pump_task.cancel()
+        async with self._changed:
+            on_close, self._on_close = self._on_close, None
+            self.closed = True
+            self._changed.notify_all()
+        if on_close:
+            await on_close()
+
+    async def _pump(self, messages):
+        try:
+            async for chunk in messages:
+                async with self._changed:
+                    self._last_id += 1
+                    self._buffer.append((self._last_id, chunk))
+                    self._changed.notify_all()
+        finally:
+            async with self._changed:
+                self.closed = True
+                self._changed.notify_all()
+            # Nobody is left to drain the buffer
+            if self._subscribers == 0:
+                asyncio.create_task(self.close())
+
+    def _events_after(self, cursor):
+        if not self._buffer:
+            return []
+        # IDs in the buffer are consecutive; events already evicted are skipped
+        start = max(0, cursor + 1 - self._buffer[0][0])
+        return list(islice(self._buffer, start, None))
+
+    def _attach(self):
+        self._subscribers += 1
+        if self._expiry:
+            self._expiry.cancel()
+            self._expiry = None
+
+    def _detach(self):
+        self._subscribers -= 1
+        if self._subscribers:
+            return
+        if self.closed:
+            asyncio.create_task(self.close())
+        else:
+            # Keep the live session for a while so the client can reconnect
+            self._expiry = asyncio.get_running_loop().call_later(
+                self._grace_seconds, lambda: asyncio.create_task(self.close())
+            )
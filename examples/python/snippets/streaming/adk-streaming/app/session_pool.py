@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bounded per-user session pool with LRU/TTL eviction.
+
+Returning users get their existing ADK session (and the last live session
+resumption handle) back instead of paying for a new session on every connect.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class PooledSession:
+    """A pooled ADK session and its live session resumption handle"""
+    session: object
+    resumption_handle: Optional[str] = None
+    in_use: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SessionPool:
+    """Keeps at most `max_sessions` sessions, evicting the least recently used
+    idle ones first and any idle session unused for `ttl_seconds`"""
+
+    def __init__(self, session_service, app_name, max_sessions=1000, ttl_seconds=1800):
+        self._session_service = session_service
+        self._app_name = app_name
+        self._max_sessions = max_sessions
+        self._ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def acquire(self, user_id):
+        """Returns the pooled session for the user, creating it on a miss"""
+        await self._evict_expired()
+
+        entry = self._entries.get(user_id)
+        if entry:
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+        else:
+            self.misses += 1
+            session = await self._session_service.create_session(
+                app_name=self._app_name,
+                user_id=user_id,
+            )
+            entry = PooledSession(session=session)
+            self._entries[user_id] = entry
+            await self._evict_overflow()
+
+        entry.in_use += 1
+        entry.last_used = time.monotonic()
+        return entry
+
+    def release(self, user_id):
+        """Marks the user's session as idle so it can be evicted later"""
+        entry = self._entries.get(user_id)
+        if entry:
+            entry.in_use = max(0, entry.in_use - 1)
+            entry.last_used = time.monotonic()
+
+    def stats(self):
+        """Returns pool size and hit/miss/eviction counters"""
+        return {
+            "size": len(self._entries),
+            "max_sessions": self._max_sessions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    async def _evict_expired(self):
+        now = time.monotonic()
+        expired = [
+            user_id for user_id, entry in self._entries.items()
+            if not entry.in_use and now - entry.last_used > self._ttl_seconds
+        ]
+        for user_id in expired:
+            await self._evict(user_id)
+
+    async def _evict_overflow(self):
+        # Oldest entries come first in the OrderedDict
+        for user_id in list(self._entries):
+            if len(self._entries) <= self._max_sessions:
+                break
+            if not self._entries[user_id].in_use:
+                await self._evict(user_id)
+
+    async def _evict(self, user_id):
+        entry = self._entries.pop(user_id)
+        self.evictions += 1
+        # Drop the session from the session service too, so memory stays flat
+        await self._session_service.delete_session(
+            app_name=self._app_name,
+            user_id=user_id,
+            session_id=entry.session.id,
+        )
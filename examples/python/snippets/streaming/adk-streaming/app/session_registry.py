@@ -0,0 +1,205 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pluggable registry of live sessions for the SSE transport.
+
+The worker that serves a user's `/events` stream owns its LiveRequestQueue.
+A `/send` POST may land on any worker, so it goes through the registry, which
+delivers it locally or forwards it to the owning worker.
+
+- InProcessSessionRegistry: a single worker, sessions kept in a dict
+- UnixSocketSessionRegistry: several workers on one host. Each worker
+  listens on its own Unix socket, and a shared directory records which
+  worker owns which user. A multi-host deployment would replace the
+  directory with a shared store such as Redis.
+"""
+
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from urllib.parse import quote
+
+# Max size of one forwarded message (base64 audio included)
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class SessionRegistry(ABC):
+    """Routes client messages to the handler of the user's live session
+
+    A handler is a callable that takes the message dict and returns the
+    response dict for the `/send` request.
+    """
+
+    async def start(self):
+        """Starts background resources, called once the event loop runs"""
+
+    async def close(self):
+        """Releases background resources"""
+
+    @abstractmethod
+    async def register(self, user_id, handler):
+        """Makes `handler` the receiver of the user's messages"""
+
+    @abstractmethod
+    async def unregister(self, user_id, handler=None):
+        """Removes the user's handler, only if it is still `handler` when given"""
+
+    @abstractmethod
+    async def send(self, user_id, message):
+        """Returns the handler's response, or None if the session is unknown"""
+
+
+class InProcessSessionRegistry(SessionRegistry):
+    """Registry for a single worker process"""
+
+    def __init__(self):
+        self._handlers = {}
+
+    async def register(self, user_id, handler):
+        self._handlers[user_id] = handler
+
+    async def unregister(self, user_id, handler=None):
+        # A reconnect may have replaced the handler already
+        if handler is None or self._handlers.get(user_id) is handler:
+            self._handlers.pop(user_id, None)
+
+    async def send(self, user_id, message):
+        handler = self._handlers.get(user_id)
+        if handler is None:
+            return None
+        return handler(message)
+
+
+class UnixSocketSessionRegistry(InProcessSessionRegistry):
+    """Registry shared by worker processes on one host over Unix sockets"""
+
+    def __init__(self, directory):
+        super().__init__()
+        self._directory = Path(directory)
+        self._owners_dir = self._directory / "owners"
+        self._socket_path = str(self._directory / f"worker-{os.getpid()}.sock")
+        self._server = None
+        # Connections from other workers, closed on shutdown
+        self._clients = set()
+        # Owner socket path -> (lock, reader, writer), one connection per peer
+        self._peers = {}
+
+    async def start(self):
+        self._owners_dir.mkdir(parents=True, exist_ok=True)
+        Path(self._socket_path).unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(
+            self._serve, path=self._socket_path, limit=_LINE_LIMIT
+        )
+
+    async def close(self):
+        for user_id in list(self._handlers):
+            await self.unregister(user_id)
+        for _, _, writer in self._peers.values():
+            writer.close()
+        self._peers.clear()
+        for writer in list(self._clients):
+            writer.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        Path(self._socket_path).unlink(missing_ok=True)
+
+    async def register(self, user_id, handler):
+        await super().register(user_id, handler)
+        # Atomically record this worker as the owner
+        owner_file = self._owner_file(user_id)
+        tmp_file = owner_file.with_name(f"{owner_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(self._socket_path)
+        os.replace(tmp_file, owner_file)
+
+    async def unregister(self, user_id, handler=None):
+        if handler is not None and self._handlers.get(user_id) is not handler:
+            return
+        await super().unregister(user_id)
+        # Keep the record if the user has since reconnected to another worker
+        owner_file = self._owner_file(user_id)
+        try:
+            if owner_file.read_text() == self._socket_path:
+                owner_file.unlink()
+        except FileNotFoundError:
+            pass
+
+    async def send(self, user_id, message):
+        response = await super().send(user_id, message)
+        if response is not None:
+            return response
+
+        try:
+            owner = self._owner_file(user_id).read_text()
+        except FileNotFoundError:
+            return None
+        if owner == self._socket_path:
+            return None
+        return await self._forward(owner, user_id, message)
+
+    async def _forward(self, owner, user_id, message):
+        request = json.dumps({"user_id": user_id, "message": message}).encode() + b"\n"
+        try:
+            peer = self._peers.get(owner)
+            if peer is None:
+                reader, writer = await asyncio.open_unix_connection(owner, limit=_LINE_LIMIT)
+                peer = self._peers.setdefault(owner, (asyncio.Lock(), reader, writer))
+                # Another request connected to the same worker meanwhile: use its connection
+                if peer[2] is not writer:
+                    writer.close()
+            lock, reader, writer = peer
+            async with lock:
+                writer.write(request)
+                await writer.drain()
+                reply = await reader.readline()
+            if not reply:
+                raise ConnectionError(f"Worker closed the connection: {owner}")
+            return json.loads(reply)
+        except OSError:
+            # The owning worker is gone, treat the session as unknown
+            peer = self._peers.pop(owner, None)
+            if peer:
+                peer[2].close()
+            return None
+
+    async def _serve(self, reader, writer):
+        """Delivers messages forwarded by other workers to local sessions"""
+        self._clients.add(writer)
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                response = await InProcessSessionRegistry.send(
+                    self, request["user_id"], request["message"]
+                )
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    def _owner_file(self, user_id):
+        return self._owners_dir / quote(user_id, safe="")
+
+
+def create_session_registry(kind, directory):
+    """Creates the registry selected by the SESSION_REGISTRY setting"""
+    if kind == "inprocess":
+        return InProcessSessionRegistry()
+    if kind == "unix":
+        return UnixSocketSessionRegistry(directory)
+    raise ValueError(f"Session registry not supported: {kind}")
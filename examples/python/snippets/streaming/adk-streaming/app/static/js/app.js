@@ -20,11 +20,18 @@ const messageForm = document.getElementById("messageForm");
 const messageInput = document.getElementById("message");
 const messagesDiv = document.getElementById("messages");
 let currentMessageId = null;
+let lastEventId = null;
 
 // SSE handlers
 function connectSSE() {
   // Connect to SSE endpoint
-  eventSource = new EventSource(sse_url + "?is_audio=" + is_audio);
+  // Pass the last event ID so the server can resume the stream and replay
+  // only the missed events (a new EventSource does not send Last-Event-ID)
+  let url = sse_url + "?is_audio=" + is_audio;
+  if (lastEventId) {
+    url += "&last_event_id=" + encodeURIComponent(lastEventId);
+  }
+  eventSource = new EventSource(url);
 
   // Handle connection open
   eventSource.onopen = function () {
@@ -39,6 +46,8 @@ function connectSSE() {
 
   // Handle incoming messages
   eventSource.onmessage = function (event) {
+    lastEventId = event.lastEventId;
+
     // Parse the incoming message
     const message_from_server = JSON.parse(event.data);
     console.log("[AGENT TO CLIENT] ", message_from_server);
@@ -0,0 +1,164 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Structured, sampled logging for the streaming examples.
+
+Log records are handed to a QueueHandler, and a background QueueListener
+thread formats and writes them (including exception tracebacks), so logging
+never blocks the event loop on stdout. Per-message logging goes through SessionLog, which counts every
+message but only logs a sample of each message type, plus a periodic
+per-session throughput summary.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+# Log 1 in N messages of each type, or of each "<type>/*" wildcard; types
+# not listed are always logged. 50 audio chunks (or 20ms Opus packets) per
+# second per user are logged about once a second.
+DEFAULT_SAMPLE_EVERY = {
+    "audio/*": 50,
+}
+
+# Seconds between per-session throughput summaries
+DEFAULT_SUMMARY_INTERVAL = 10.0
+
+# Fields passed with `extra=` that are copied into the structured output
+_EXTRA_FIELDS = ("session", "direction", "mime_type", "size", "count", "stats")
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in _EXTRA_FIELDS:
+            if hasattr(record, name):
+                entry[name] = getattr(record, name)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RawQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread. The stock
+    prepare() formats on the caller's thread and drops exc_info; this one only
+    merges the message arguments, which may change once the call returns.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level=logging.INFO):
+    """Routes all logging through a queue drained by a background thread"""
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(StructuredFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [RawQueueHandler(log_queue)]
+    root_logger.setLevel(level)
+
+    listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
+
+
+class SessionLog:
+    """Sampled message logging and rate counters for one streaming session"""
+
+    def __init__(
+        self,
+        logger,
+        session_id,
+        sample_every=None,
+        summary_interval=DEFAULT_SUMMARY_INTERVAL,
+    ):
+        self._logger = logger
+        self.session_id = session_id
+        self._sample_every = DEFAULT_SAMPLE_EVERY if sample_every is None else sample_every
+        self._summary_interval = summary_interval
+        self._started = time.monotonic()
+        self._last_summary = self._started
+        # (direction, mime_type) -> [messages, bytes]
+        self._counters = {}
+
+    def message(self, direction, mime_type, size, detail=None):
+        """Counts a message and logs it if it falls in the sample"""
+        counter = self._counters.setdefault((direction, mime_type), [0, 0])
+        counter[0] += 1
+        counter[1] += size
+
+        if counter[0] % self._sample_interval(mime_type) == 0 and self._logger.isEnabledFor(logging.INFO):
+            self._logger.info(
+                "%s %s: %s",
+                direction,
+                mime_type,
+                detail if detail is not None else f"{size} bytes",
+                extra={
+                    "session": self.session_id,
+                    "direction": direction,
+                    "mime_type": mime_type,
+                    "size": size,
+                    "count": counter[0],
+                },
+            )
+
+        now = time.monotonic()
+        if now - self._last_summary >= self._summary_interval:
+            self._last_summary = now
+            self.summary()
+
+    def _sample_interval(self, mime_type):
+        if mime_type in self._sample_every:
+            return self._sample_every[mime_type]
+        return self._sample_every.get(mime_type.split("/")[0] + "/*", 1)
+
+    def stats(self):
+        """Returns per-direction, per-type message and byte counts and rates"""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            f"{direction} {mime_type}": {
+                "messages": messages,
+                "bytes": size,
+                "messages_per_second": round(messages / elapsed, 2),
+                "bytes_per_second": round(size / elapsed, 2),
+            }
+            for (direction, mime_type), (messages, size) in self._counters.items()
+        }
+
+    def summary(self):
+        """Logs the current rate counters"""
+        self._logger.info(
+            "Session throughput",
+            extra={"session": self.session_id, "stats": self.stats()},
+        )
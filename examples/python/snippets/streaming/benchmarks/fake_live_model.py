@@ -0,0 +1,156 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Offline stand-in for a live (BIDI) model.
+
+FakeLiveLlm answers every user turn with a scripted response at a realistic
+pace: `audio_chunks` chunks of `chunk_ms` of 24kHz PCM (plus output
+transcription) in AUDIO modality, or `text_chunks` partial text chunks in
+TEXT modality, followed by turn_complete.
+
+Each chunk carries the wall-clock time it was emitted, so clients can measure
+event latency: the first 8 bytes of every audio chunk are a big-endian double
+timestamp, and every text chunk starts with "[<timestamp>]".
+"""
+
+import asyncio
+import contextlib
+import struct
+import time
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.base_llm_connection import BaseLlmConnection
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# Output audio format of Gemini live models: 24kHz, 16-bit, mono PCM
+OUTPUT_SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+TIMESTAMP = struct.Struct("!d")
+
+# Uplink audio that counts as one user turn: 16kHz, 16-bit, 1 second
+UPLINK_BYTES_PER_TURN = 16000 * SAMPLE_WIDTH
+
+
+def text_chunk(index):
+    """Returns a scripted text chunk stamped with the current time"""
+    return f"[{time.time():.6f}] chunk {index} "
+
+
+def audio_chunk(chunk_ms):
+    """Returns `chunk_ms` of silent PCM whose first bytes are the current time"""
+    size = OUTPUT_SAMPLE_RATE * SAMPLE_WIDTH * chunk_ms // 1000
+    return TIMESTAMP.pack(time.time()) + bytes(size - TIMESTAMP.size)
+
+
+class FakeLiveConnection(BaseLlmConnection):
+    """Live connection that replies to each user turn with a scripted turn"""
+
+    def __init__(self, is_audio, audio_chunks, text_chunks, chunk_ms):
+        self._is_audio = is_audio
+        self._audio_chunks = audio_chunks
+        self._text_chunks = text_chunks
+        self._chunk_ms = chunk_ms
+        self._responses = asyncio.Queue()
+        self._uplink_bytes = 0
+        self._turns = set()
+
+    async def send_history(self, history):
+        pass
+
+    async def send_content(self, content):
+        # A text message (or function response) closes the user's turn
+        self._start_turn()
+
+    async def send_realtime(self, input):
+        if isinstance(input, types.Blob):
+            self._uplink_bytes += len(input.data)
+            # Treat every second of uplink audio as a finished utterance
+            if self._uplink_bytes >= UPLINK_BYTES_PER_TURN:
+                self._uplink_bytes = 0
+                self._start_turn()
+
+    async def receive(self):
+        while (response := await self._responses.get()) is not None:
+            yield response
+
+    async def close(self):
+        for turn in self._turns:
+            turn.cancel()
+        self._responses.put_nowait(None)
+
+    def _start_turn(self):
+        turn = asyncio.create_task(self._play_turn())
+        self._turns.add(turn)
+        turn.add_done_callback(self._turns.discard)
+
+    async def _play_turn(self):
+        interval = self._chunk_ms / 1000
+        if self._is_audio:
+            for index in range(self._audio_chunks):
+                self._responses.put_nowait(LlmResponse(
+                    content=types.Content(role="model", parts=[
+                        types.Part(inline_data=types.Blob(
+                            mime_type=f"audio/pcm;rate={OUTPUT_SAMPLE_RATE}",
+                            data=audio_chunk(self._chunk_ms),
+                        ))
+                    ]),
+                    partial=True,
+                ))
+                if index % 10 == 0:
+                    self._responses.put_nowait(LlmResponse(
+                        output_transcription=types.Transcription(text=text_chunk(index)),
+                        partial=True,
+                    ))
+                # Audio is produced in real time
+                await asyncio.sleep(interval)
+        else:
+            for index in range(self._text_chunks):
+                self._responses.put_nowait(LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text_chunk(index))]),
+                    partial=True,
+                ))
+                await asyncio.sleep(interval)
+        self._responses.put_nowait(LlmResponse(turn_complete=True))
+
+
+class FakeLiveLlm(BaseLlm):
+    """BaseLlm whose live connection plays scripted turns, fully offline"""
+
+    model: str = "fake-live"
+    audio_chunks: int = 50
+    text_chunks: int = 10
+    chunk_ms: int = 40
+
+    @classmethod
+    def supported_models(cls):
+        return [r"fake-live.*"]
+
+    async def generate_content_async(self, llm_request, stream=False):
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text_chunk(0))]),
+        )
+
+    @contextlib.asynccontextmanager
+    async def connect(self, llm_request):
+        modalities = []
+        if llm_request.live_connect_config:
+            modalities = llm_request.live_connect_config.response_modalities or []
+        is_audio = any(str(modality).upper().endswith("AUDIO") for modality in modalities)
+        connection = FakeLiveConnection(is_audio, self.audio_chunks, self.text_chunks, self.chunk_ms)
+        try:
+            yield connection
+        finally:
+            await connection.close()
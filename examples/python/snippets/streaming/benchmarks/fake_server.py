@@ -0,0 +1,66 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Serves one of the streaming example apps with FakeLiveLlm as its model.
+
+Started by load_test.py in a subprocess, so the server's CPU and memory can
+be measured apart from the synthetic clients.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+APP_DIRS = {
+    "ws": BENCHMARKS_DIR.parent / "adk-streaming-ws" / "app",
+    "sse": BENCHMARKS_DIR.parent / "adk-streaming" / "app",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--app", choices=sorted(APP_DIRS), required=True)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--audio-chunks", type=int, default=50)
+    parser.add_argument("--text-chunks", type=int, default=10)
+    parser.add_argument("--chunk-ms", type=int, default=40)
+    args = parser.parse_args()
+
+    # The apps load static files and their agent relative to the app directory
+    app_dir = APP_DIRS[args.app]
+    os.chdir(app_dir)
+    sys.path[:0] = [str(app_dir), str(BENCHMARKS_DIR)]
+    os.environ.setdefault("DEMO_AGENT_MODEL", "fake-live")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import main as streaming_app
+    from fake_live_model import FakeLiveLlm
+
+    # Swap in the offline model; the google_search tool needs a real Gemini model
+    streaming_app.root_agent.model = FakeLiveLlm(
+        audio_chunks=args.audio_chunks,
+        text_chunks=args.text_chunks,
+        chunk_ms=args.chunk_ms,
+    )
+    streaming_app.root_agent.tools = []
+
+    uvicorn.run(streaming_app.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Load test for the streaming example apps, fully offline.
+
+Starts adk-streaming-ws (--app ws) or adk-streaming (--app sse) with
+FakeLiveLlm in a subprocess, runs N synthetic clients that each play a number
+of turns, and reports event latency percentiles, server CPU and memory per
+session, and dropped messages.
+
+    python load_test.py --app ws --sessions 100 --turns 3 --audio
+
+Exits with status 1 when --max-p99-ms or --max-dropped is exceeded, so it can
+guard against regressions in CI.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import re
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import websockets
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+
+# Must match fake_live_model.py
+OUTPUT_SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+TIMESTAMP = struct.Struct("!d")
+TIMESTAMP_PATTERN = re.compile(r"\[(\d+\.\d+)\]")
+
+# Client uplink audio: 1 second of 16kHz PCM in 20ms chunks, one turn
+UPLINK_CHUNK = bytes(16000 * SAMPLE_WIDTH * 20 // 1000)
+UPLINK_CHUNKS_PER_TURN = 50
+
+# Binary frame type of raw PCM, see adk-streaming-ws/app/frames.py
+FRAME_AUDIO_PCM = b"\x01"
+
+
+class ClientStats:
+    """Events received by all synthetic clients"""
+
+    def __init__(self):
+        self.latencies = []
+        self.audio_bytes = 0
+        self.text_chunks = 0
+        self.turns_completed = 0
+        self.turns_timed_out = 0
+        self.errors = 0
+
+    def on_audio(self, audio, received_at):
+        self.audio_bytes += len(audio)
+        # Coalesced audio carries the timestamp of its first chunk
+        (sent_at,) = TIMESTAMP.unpack_from(audio)
+        self.latencies.append(received_at - sent_at)
+
+    def on_text(self, text, received_at):
+        for sent_at in TIMESTAMP_PATTERN.findall(text):
+            self.text_chunks += 1
+            self.latencies.append(received_at - float(sent_at))
+
+    def on_message(self, message, received_at):
+        """Records a JSON message; returns True on turn_complete"""
+        if message.get("turn_complete"):
+            self.turns_completed += 1
+            return True
+        if message.get("mime_type") == "audio/pcm":
+            self.on_audio(base64.b64decode(message["data"]), received_at)
+        elif message.get("mime_type") == "text/plain":
+            self.on_text(message["data"], received_at)
+        return False
+
+
+#
+# Synthetic clients
+#
+
+async def ws_client(args, user_id, stats):
+    """One adk-streaming-ws client playing args.turns turns"""
+    url = (
+        f"ws://127.0.0.1:{args.port}/ws/{user_id}"
+        f"?is_audio={str(args.audio).lower()}&protocol={args.protocol}"
+    )
+
+    async def receive_turn(websocket):
+        while True:
+            frame = await websocket.recv()
+            received_at = time.time()
+            if isinstance(frame, bytes):
+                stats.on_audio(frame[1:], received_at)
+            elif stats.on_message(json.loads(frame), received_at):
+                return
+
+    async with websockets.connect(url, max_size=None) as websocket:
+        for _ in range(args.turns):
+            if args.audio:
+                for _ in range(UPLINK_CHUNKS_PER_TURN):
+                    if args.protocol == "binary":
+                        await websocket.send(FRAME_AUDIO_PCM + UPLINK_CHUNK)
+                    else:
+                        await websocket.send(json.dumps({
+                            "mime_type": "audio/pcm",
+                            "data": base64.b64encode(UPLINK_CHUNK).decode("ascii"),
+                        }))
+                    await asyncio.sleep(0.02)
+            else:
+                await websocket.send(json.dumps({"mime_type": "text/plain", "data": "Hello"}))
+
+            try:
+                await asyncio.wait_for(receive_turn(websocket), args.turn_timeout)
+            except asyncio.TimeoutError:
+                stats.turns_timed_out += 1
+
+
+async def sse_client(args, user_id, stats):
+    """One adk-streaming client playing args.turns turns"""
+    base_url = f"http://127.0.0.1:{args.port}"
+    turn_completed = asyncio.Queue()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+
+        async def read_events():
+            params = {"is_audio": str(args.audio).lower()}
+            async with client.stream("GET", f"/events/{user_id}", params=params) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        if stats.on_message(json.loads(line[6:]), time.time()):
+                            turn_completed.put_nowait(True)
+
+        reader = asyncio.create_task(read_events())
+        try:
+            # Wait until the server has registered the session
+            await asyncio.sleep(0.5)
+            for _ in range(args.turns):
+                if args.audio:
+                    message = {
+                        "mime_type": "audio/pcm",
+                        "data": base64.b64encode(UPLINK_CHUNK).decode("ascii"),
+                    }
+                    for _ in range(UPLINK_CHUNKS_PER_TURN):
+                        await client.post(f"/send/{user_id}", json=message)
+                        await asyncio.sleep(0.02)
+                else:
+                    await client.post(f"/send/{user_id}", json={"mime_type": "text/plain", "data": "Hello"})
+
+                try:
+                    await asyncio.wait_for(turn_completed.get(), args.turn_timeout)
+                except asyncio.TimeoutError:
+                    stats.turns_timed_out += 1
+        finally:
+            reader.cancel()
+
+
+async def run_clients(args, stats):
+    client = ws_client if args.app == "ws" else sse_client
+
+    async def run_one(index):
+        # Spread the connects over the ramp-up period
+        await asyncio.sleep(args.ramp_up * index / args.sessions)
+        try:
+            await client(args, 100000 + index, stats)
+        except Exception as e:
+            stats.errors += 1
+            print(f"Client {index} failed: {e!r}", file=sys.stderr)
+
+    await asyncio.gather(*(run_one(index) for index in range(args.sessions)))
+
+
+#
+# Server process
+#
+
+def read_process_usage(pid):
+    """Returns (cpu seconds, RSS bytes) of a process, read from /proc"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    return cpu_seconds, rss_kb * 1024
+
+
+async def sample_peak_rss(pid, peak, stop):
+    while not stop.is_set():
+        peak[0] = max(peak[0], read_process_usage(pid)[1])
+        await asyncio.sleep(0.2)
+
+
+async def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"http://127.0.0.1:{port}/")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server did not start on port {port}")
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+async def run(args):
+    server = subprocess.Popen([
+        sys.executable, str(BENCHMARKS_DIR / "fake_server.py"),
+        "--app", args.app,
+        "--port", str(args.port),
+        "--audio-chunks", str(args.audio_chunks),
+        "--text-chunks", str(args.text_chunks),
+        "--chunk-ms", str(args.chunk_ms),
+    ])
+    try:
+        await wait_for_server(args.port)
+        cpu_before, rss_before = read_process_usage(server.pid)
+
+        stats = ClientStats()
+        peak_rss = [rss_before]
+        stop_sampling = asyncio.Event()
+        sampler = asyncio.create_task(sample_peak_rss(server.pid, peak_rss, stop_sampling))
+        started = time.monotonic()
+        await run_clients(args, stats)
+        wall_seconds = time.monotonic() - started
+        stop_sampling.set()
+        await sampler
+
+        cpu_after, _ = read_process_usage(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    # Expected events per turn, as scripted in fake_live_model.py
+    turns = args.sessions * args.turns
+    audio_chunk_bytes = OUTPUT_SAMPLE_RATE * SAMPLE_WIDTH * args.chunk_ms // 1000
+    if args.audio:
+        expected_audio_bytes = turns * args.audio_chunks * audio_chunk_bytes
+        # Output transcriptions are only forwarded by the WebSocket app
+        expected_text_chunks = turns * math.ceil(args.audio_chunks / 10) if args.app == "ws" else 0
+    else:
+        expected_audio_bytes = 0
+        expected_text_chunks = turns * args.text_chunks
+    dropped_audio_chunks = (expected_audio_bytes - stats.audio_bytes) // audio_chunk_bytes
+    dropped = dropped_audio_chunks + expected_text_chunks - stats.text_chunks
+
+    cpu_seconds = cpu_after - cpu_before
+    p50 = percentile(stats.latencies, 0.50)
+    p99 = percentile(stats.latencies, 0.99)
+    return {
+        "app": args.app,
+        "protocol": args.protocol if args.app == "ws" else "sse",
+        "modality": "audio" if args.audio else "text",
+        "sessions": args.sessions,
+        "turns_completed": stats.turns_completed,
+        "turns_timed_out": stats.turns_timed_out,
+        "client_errors": stats.errors,
+        "events_received": len(stats.latencies),
+        "dropped_messages": dropped,
+        "latency_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+        "latency_p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+        "wall_seconds": round(wall_seconds, 2),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "cpu_percent_per_session": round(100 * cpu_seconds / wall_seconds / args.sessions, 3),
+        "memory_kb_per_session": round((peak_rss[0] - rss_before) / 1024 / args.sessions, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--app", choices=["ws", "sse"], default="ws")
+    parser.add_argument("--protocol", choices=["json", "binary"], default="binary",
+                        help="WebSocket protocol mode (ws only)")
+    parser.add_argument("--audio", action="store_true", help="Use AUDIO modality and uplink audio")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="Seconds over which clients connect")
+    parser.add_argument("--turn-timeout", type=float, default=30.0)
+    parser.add_argument("--audio-chunks", type=int, default=50, help="Audio chunks per model turn")
+    parser.add_argument("--text-chunks", type=int, default=10, help="Text chunks per model turn")
+    parser.add_argument("--chunk-ms", type=int, default=40, help="Pace of model chunks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--max-p99-ms", type=float, help="Fail if p99 latency exceeds this")
+    parser.add_argument("--max-dropped", type=int, help="Fail if more messages are dropped")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        print(f"{key:>26}: {value}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+    failures = []
+    if args.max_p99_ms is not None and (report["latency_p99_ms"] or 0) > args.max_p99_ms:
+        failures.append(f"p99 latency {report['latency_p99_ms']}ms > {args.max_p99_ms}ms")
+    if args.max_dropped is not None and report["dropped_messages"] > args.max_dropped:
+        failures.append(f"{report['dropped_messages']} dropped messages > {args.max_dropped}")
+    if report["client_errors"] or report["turns_timed_out"]:
+        failures.append(f"{report['client_errors']} client errors, {report['turns_timed_out']} turns timed out")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pooled HTTP connections for OpenAPI tools.
+
+By default every RestApiTool call opens its own httpx.AsyncClient, so each
+call pays a new TCP (and TLS) handshake. ConnectionPool is one long-lived
+client shared by all the tools of a toolset, passed as their
+`httpx_client_factory`: connections are kept alive between calls, capped per
+host, and use HTTP/2 when the optional `h2` package is installed
+(`pip install httpx[http2]`). A ResponseCache (see openapi_response_cache.py)
+and a ResponseShaper (see openapi_response_shaping.py) can be layered on top
+of the connections; the cache stores shaped responses.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import httpx
+
+from openapi_response_cache import ResponseCache
+from openapi_response_shaping import ResponseShaper
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# Same bounds as RestApiTool's own client: fail fast on connect, allow slow APIs
+DEFAULT_TIMEOUT = httpx.Timeout(connect=10.0, read=600.0, write=600.0, pool=10.0)
+
+
+@dataclass
+class HostStats:
+    """Connection usage of one origin"""
+    requests: int = 0
+    connections_opened: int = 0
+    tls_handshakes: int = 0
+    http2_responses: int = 0
+
+
+class _SharedAsyncClient(httpx.AsyncClient):
+    """Client that stays open when a tool leaves its `async with` block"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class _PerHostTransport(httpx.AsyncBaseTransport):
+    """Routes each origin to its own connection pool, so limits apply per host"""
+
+    def __init__(self, create_transport):
+        self._create_transport = create_transport
+        self._transports: Dict[str, httpx.AsyncBaseTransport] = {}
+        self.stats: Dict[str, HostStats] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url
+        origin = f"{url.scheme}://{url.host}" + (f":{url.port}" if url.port else "")
+        if origin not in self._transports:
+            self._transports[origin] = self._create_transport()
+            self.stats[origin] = HostStats()
+        stats = self.stats[origin]
+        stats.requests += 1
+
+        # httpcore reports connection setup through the trace extension
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+            elif event_name == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+
+        request.extensions = {**request.extensions, "trace": trace}
+        response = await self._transports[origin].handle_async_request(request)
+        if response.extensions.get("http_version") == b"HTTP/2":
+            stats.http2_responses += 1
+        return response
+
+    async def aclose(self):
+        for transport in self._transports.values():
+            await transport.aclose()
+        self._transports.clear()
+
+
+class ConnectionPool:
+    """
+    Long-lived httpx client shared by the RestApiTools of a toolset.
+    TLS verification is configured here: tools ignore `ssl_verify` when
+    they are given a client factory. With `response_cache`, GET responses
+    of CachingRestApiTools are served from it when possible; with
+    `response_shaper`, JSON responses of ShapingRestApiTools are bounded.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 10,
+        max_keepalive_per_host: Optional[int] = None,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        verify=True,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        response_cache: Optional[ResponseCache] = None,
+        response_shaper: Optional[ResponseShaper] = None,
+    ):
+        # HTTP/2 where available: httpx needs the h2 package for it
+        self.http2 = http2 and h2 is not None
+        limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._transport = _PerHostTransport(
+            lambda: httpx.AsyncHTTPTransport(verify=verify, http2=self.http2, limits=limits)
+        )
+        self.response_cache = response_cache
+        self.response_shaper = response_shaper
+        transport = response_shaper.wrap(self._transport) if response_shaper else self._transport
+        transport = response_cache.wrap(transport) if response_cache else transport
+        self._client = _SharedAsyncClient(transport=transport, timeout=timeout)
+
+    def client_factory(self) -> httpx.AsyncClient:
+        """The `httpx_client_factory` to give RestApiTool / OpenAPIToolset"""
+        return self._client
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Returns per-origin counters; reused connections are requests without a new connection"""
+        return {
+            origin: {**asdict(stats), "reused": stats.requests - stats.connections_opened}
+            for origin, stats in self._transport.stats.items()
+        }
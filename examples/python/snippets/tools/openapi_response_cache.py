@@ -0,0 +1,220 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Response cache for idempotent OpenAPI operations.
+
+ResponseCache sits in a ConnectionPool's transport and stores the responses
+of GET operations, keyed on the operationId, the user and the normalized
+tool arguments (CachingRestApiTool marks its requests with that key). It
+honors the response's Cache-Control (`no-store`, `no-cache`, `max-age`),
+and revalidates stale entries that have an ETag or Last-Modified with a
+conditional request: a 304 costs a round trip but no payload.
+
+An operation can override the response's lifetime in the spec:
+
+    "get": {"operationId": "listPets", "x-adk-cache-ttl": 60, ...}
+
+A TTL of 0 disables caching for the operation.
+"""
+
+import contextvars
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from google.adk.tools.openapi_tool.openapi_spec_parser.rest_api_tool import RestApiTool
+
+# Operation-level spec extension overriding the freshness lifetime, in seconds
+CACHE_TTL_EXTENSION = "x-adk-cache-ttl"
+
+# Headers describing the upstream encoding, dropped as the body is stored decoded
+_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+@dataclass
+class CacheScope:
+    """Cache key and TTL override of the operation being called"""
+    key: str
+    ttl: Optional[float] = None
+
+
+# Set by CachingRestApiTool around its request, read by CachingTransport
+cache_scope: contextvars.ContextVar[Optional[CacheScope]] = contextvars.ContextVar("cache_scope", default=None)
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: List[Tuple[str, str]]
+    # Decoded body (e.g. gunzipped)
+    content: bytes
+    expires_at: float
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers to revalidate the entry"""
+        headers = httpx.Headers(self.headers)
+        validators = {}
+        if "etag" in headers:
+            validators["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            validators["If-Modified-Since"] = headers["last-modified"]
+        return validators
+
+
+def operation_cache_key(operation_id: str, args: Dict[str, Any], user_id: Optional[str] = None) -> str:
+    """Key of a call: the same operation, user and arguments share an entry"""
+    return json.dumps([operation_id, user_id, args], sort_keys=True, default=str)
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives = {}
+    for directive in value.split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: httpx.Headers, ttl: Optional[float], default_ttl: float) -> Optional[float]:
+    """Seconds the response is fresh for, or None if it must not be stored"""
+    directives = parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in directives:
+        return None
+    if ttl is not None:
+        return ttl
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        return float(directives["max-age"])
+    except (KeyError, TypeError, ValueError):
+        return default_ttl
+
+
+class ResponseCache:
+    """LRU cache of GET responses, shared by the tools of a toolset"""
+
+    def __init__(self, max_entries: int = 256, default_ttl: float = 0.0):
+        self.max_entries = max_entries
+        # Lifetime of responses without Cache-Control; 0 keeps them only for revalidation
+        self.default_ttl = default_ttl
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def wrap(self, transport: httpx.AsyncBaseTransport) -> "CachingTransport":
+        return CachingTransport(transport, self)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+        }
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Serves marked GET requests from the cache, revalidating stale entries"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: ResponseCache):
+        self._transport = transport
+        self._cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        scope = cache_scope.get()
+        if scope is None or request.method != "GET" or scope.ttl == 0:
+            return await self._transport.handle_async_request(request)
+
+        entry = self._cache.get(scope.key)
+        if entry and entry.expires_at > time.monotonic():
+            self._cache.hits += 1
+            return self._replay(entry, request)
+        if entry:
+            request.headers.update(entry.validators)
+
+        response = await self._transport.handle_async_request(request)
+        if entry and response.status_code == 304:
+            await response.aclose()
+            self._cache.revalidated += 1
+            # The 304 carries the new freshness information
+            lifetime = freshness_lifetime(response.headers, scope.ttl, self._cache.default_ttl)
+            if lifetime is None:
+                self._cache.discard(scope.key)
+            else:
+                entry.expires_at = time.monotonic() + lifetime
+            return self._replay(entry, request)
+
+        self._cache.misses += 1
+        lifetime = freshness_lifetime(response.headers, scope.ttl, self._cache.default_ttl)
+        if response.status_code != 200 or lifetime is None:
+            self._cache.discard(scope.key)
+            return response
+        content = await response.aread()
+        await response.aclose()
+        headers = [(name, value) for name, value in response.headers.multi_items() if name not in _BODY_HEADERS]
+        entry = CachedResponse(200, headers, content, time.monotonic() + lifetime)
+        # Entries that are never fresh are only worth keeping with a validator
+        if lifetime > 0 or entry.validators:
+            self._cache.put(scope.key, entry)
+        return self._replay(entry, request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    @staticmethod
+    def _replay(entry: CachedResponse, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(entry.status_code, headers=entry.headers, content=entry.content, request=request)
+
+
+class CachingRestApiTool(RestApiTool):
+    """RestApiTool that marks its GET requests for the ResponseCache"""
+
+    async def call(self, *, args: Dict[str, Any], tool_context=None) -> Dict[str, Any]:
+        if self.endpoint.method.lower() != "get":
+            return await super().call(args=args, tool_context=tool_context)
+        ttl = (self.operation.model_extra or {}).get(CACHE_TTL_EXTENSION)
+        scope = CacheScope(
+            key=operation_cache_key(
+                self.operation.operationId or self.name, args, tool_context.user_id if tool_context else None
+            ),
+            ttl=float(ttl) if ttl is not None else None,
+        )
+        token = cache_scope.set(scope)
+        try:
+            return await super().call(args=args, tool_context=tool_context)
+        finally:
+            cache_scope.reset(token)
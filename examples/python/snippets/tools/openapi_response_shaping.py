@@ -0,0 +1,309 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bounded JSON responses for OpenAPI tools.
+
+RestApiTool hands the whole response body to the model. ResponseShaper sits
+in a ConnectionPool's transport and rewrites the JSON responses of
+ShapingRestApiTools before the tool sees them:
+
+- projection: only the fields allowed for the operation are kept;
+- arrays are cut to `max_items`, and strings to `max_string_chars`;
+- once `max_chars` of output is kept, further values are dropped;
+- at most `max_response_bytes` of the body is read.
+
+With the optional `ijson` package the body is parsed while it streams, so
+memory stays bounded whatever the API returns; without it, bodies up to
+`max_response_bytes` are read whole. What was cut is reported to the model
+in a `_truncated` entry.
+
+Fields are dotted paths, with `[]` (or JSONPath's `[*]`) for array items,
+set per operation in the spec or on the shaper:
+
+    "get": {"operationId": "listPets", "x-adk-response-fields": ["pets[].name", "total"], ...}
+"""
+
+import contextvars
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from openapi_response_cache import CachingRestApiTool
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Operation-level spec extension listing the response fields to keep
+RESPONSE_FIELDS_EXTENSION = "x-adk-response-fields"
+
+# Headers describing the upstream encoding, which no longer apply once shaped
+_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+@dataclass
+class ShapingScope:
+    """Operation being called and its response fields from the spec"""
+    operation_id: str
+    fields: Optional[List[str]] = None
+
+
+# Set by ShapingRestApiTool around its request, read by ShapingTransport
+shaping_scope: contextvars.ContextVar[Optional[ShapingScope]] = contextvars.ContextVar("shaping_scope", default=None)
+
+
+def to_prefix(path: str) -> str:
+    """Converts `$.pets[*].name` / `pets[].name` to ijson's `pets.item.name`"""
+    path = path.removeprefix("$")
+    path = path.replace("[*]", ".item").replace("[]", ".item")
+    return ".".join(part for part in path.split(".") if part)
+
+
+def from_prefix(prefix: str) -> str:
+    """Converts ijson's `pets.item` back to `pets[]` for the model"""
+    path = ""
+    for part in prefix.split(".") if prefix else []:
+        path += "[]" if part == "item" else f".{part}" if path else part
+    return path or "$"
+
+
+def json_events(value: Any, prefix: str = "") -> Iterator[Tuple[str, str, Any]]:
+    """ijson-style parse events of an already decoded value"""
+    if isinstance(value, dict):
+        yield prefix, "start_map", None
+        for key, item in value.items():
+            yield prefix, "map_key", key
+            yield from json_events(item, f"{prefix}.{key}" if prefix else key)
+        yield prefix, "end_map", None
+    elif isinstance(value, list):
+        yield prefix, "start_array", None
+        for item in value:
+            yield from json_events(item, f"{prefix}.item" if prefix else "item")
+        yield prefix, "end_array", None
+    else:
+        yield prefix, "value", value
+
+
+@dataclass
+class _Container:
+    prefix: str
+    value: Any
+    key: Optional[str] = None
+    # Array items seen, kept or not
+    seen: int = 0
+
+
+@dataclass
+class ShapedJson:
+    """Builds the shaped value from parse events, keeping only what fits"""
+    fields: List[str]
+    max_items: int
+    max_string_chars: int
+    max_chars: int
+    root: Any = None
+    chars: int = 0
+    truncated_arrays: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    budget_exhausted: bool = False
+    body_truncated: bool = False
+    _stack: List[_Container] = field(default_factory=list)
+    # Depth inside a dropped value
+    _skipping: int = 0
+
+    def feed(self, prefix: str, event: str, value: Any):
+        starts = event in ("start_map", "start_array")
+        if self._skipping:
+            if starts:
+                self._skipping += 1
+            elif event in ("end_map", "end_array"):
+                self._skipping -= 1
+            return
+        if event == "map_key":
+            self._stack[-1].key = value
+            return
+        if event in ("end_map", "end_array"):
+            container = self._stack.pop()
+            if container.seen > self.max_items:
+                self.truncated_arrays[from_prefix(container.prefix)] = {"kept": self.max_items, "total": container.seen}
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        if parent and isinstance(parent.value, list):
+            parent.seen += 1
+            if parent.seen > self.max_items:
+                self._skipping = int(starts)
+                return
+        if not self._selected(prefix, starts):
+            self._skipping = int(starts)
+            return
+        if self.chars >= self.max_chars:
+            self.budget_exhausted = True
+            self._skipping = int(starts)
+            return
+
+        if starts:
+            value = {} if event == "start_map" else []
+            self.chars += 2
+        else:
+            if isinstance(value, Decimal):
+                value = int(value) if value == value.to_integral_value() else float(value)
+            elif isinstance(value, str) and len(value) > self.max_string_chars:
+                value = value[:self.max_string_chars] + "..."
+            self.chars += len(str(value)) + 2
+        if parent is None:
+            self.root = value
+        elif isinstance(parent.value, list):
+            parent.value.append(value)
+        else:
+            self.chars += len(parent.key)
+            parent.value[parent.key] = value
+        if starts:
+            self._stack.append(_Container(prefix, value))
+
+    def result(self) -> Any:
+        """The shaped value, with a `_truncated` entry if anything was cut"""
+        truncated = {}
+        if self.truncated_arrays:
+            truncated["arrays"] = self.truncated_arrays
+        if self.budget_exhausted:
+            truncated["output_budget_exhausted"] = True
+        if self.body_truncated:
+            truncated["response_body_incomplete"] = True
+        if not truncated:
+            return self.root
+        if isinstance(self.root, dict):
+            return {**self.root, "_truncated": truncated}
+        return {"result": self.root, "_truncated": truncated}
+
+    def _selected(self, prefix: str, container: bool) -> bool:
+        if not self.fields:
+            return True
+        for allowed in self.fields:
+            # The field itself, anything inside it, or a container on its way
+            if prefix == allowed or prefix.startswith(allowed + "."):
+                return True
+            if container and (not prefix or allowed.startswith(prefix + ".")):
+                return True
+        return False
+
+
+class ResponseShaper:
+    """
+    Shapes the JSON responses of ShapingRestApiTools. `fields` maps
+    operationIds to allowed fields, overriding the spec's
+    x-adk-response-fields.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Dict[str, List[str]]] = None,
+        max_items: int = 50,
+        max_string_chars: int = 2000,
+        max_chars: int = 50_000,
+        max_response_bytes: int = 10 * 1024 * 1024,
+    ):
+        self.fields = fields or {}
+        self.max_items = max_items
+        self.max_string_chars = max_string_chars
+        self.max_chars = max_chars
+        self.max_response_bytes = max_response_bytes
+
+    def wrap(self, transport: httpx.AsyncBaseTransport) -> "ShapingTransport":
+        return ShapingTransport(transport, self)
+
+    def builder(self, scope: ShapingScope) -> ShapedJson:
+        fields = self.fields.get(scope.operation_id, scope.fields) or []
+        return ShapedJson([to_prefix(path) for path in fields], self.max_items, self.max_string_chars, self.max_chars)
+
+
+class ShapingTransport(httpx.AsyncBaseTransport):
+    """Replaces marked JSON responses by their shaped version"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, shaper: ResponseShaper):
+        self._transport = transport
+        self._shaper = shaper
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        scope = shaping_scope.get()
+        if scope is None or response.status_code != 200 or "json" not in response.headers.get("content-type", ""):
+            return response
+
+        shaped = self._shaper.builder(scope)
+        try:
+            if ijson:
+                await self._stream_parse(response, shaped)
+            else:
+                await self._parse(response, shaped)
+        finally:
+            await response.aclose()
+        headers = [(name, value) for name, value in response.headers.multi_items() if name not in _BODY_HEADERS]
+        return httpx.Response(200, headers=headers, json=shaped.result(), request=request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    async def _stream_parse(self, response: httpx.Response, shaped: ShapedJson):
+        events = ijson.sendable_list()
+        parser = ijson.parse_coro(events)
+        received = 0
+        try:
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > self._shaper.max_response_bytes:
+                    shaped.body_truncated = True
+                    return
+                parser.send(chunk)
+                for event in events:
+                    shaped.feed(*event)
+                del events[:]
+            parser.close()
+            for event in events:
+                shaped.feed(*event)
+        except ijson.JSONError:
+            shaped.body_truncated = True
+
+    async def _parse(self, response: httpx.Response, shaped: ShapedJson):
+        chunks, received = [], 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > self._shaper.max_response_bytes:
+                shaped.body_truncated = True
+                return
+            chunks.append(chunk)
+        try:
+            value = json.loads(b"".join(chunks))
+        except ValueError:
+            shaped.body_truncated = True
+            return
+        for event in json_events(value):
+            shaped.feed(*event)
+
+
+class ShapingRestApiTool(CachingRestApiTool):
+    """CachingRestApiTool that also marks its requests for the ResponseShaper"""
+
+    async def call(self, *, args: Dict[str, Any], tool_context=None) -> Dict[str, Any]:
+        scope = ShapingScope(
+            operation_id=self.operation.operationId or self.name,
+            fields=(self.operation.model_extra or {}).get(RESPONSE_FIELDS_EXTENSION),
+        )
+        token = shaping_scope.set(scope)
+        try:
+            return await super().call(args=args, tool_context=tool_context)
+        finally:
+            shaping_scope.reset(token)
@@ -22,7 +22,14 @@ from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
 # --- OpenAPI Tool Imports ---
-from google.adk.tools.openapi_tool.openapi_spec_parser.openapi_toolset import OpenAPIToolset
+# CompiledOpenAPIToolset is an OpenAPIToolset that caches the parsed spec on disk
+from openapi_toolset_helpers import CompiledOpenAPIToolset
+# ConnectionPool keeps HTTP connections alive across tool calls
+from openapi_http_pool import ConnectionPool
+# ResponseCache serves repeated GET calls (e.g. listPets) without a round trip
+from openapi_response_cache import ResponseCache
+# ResponseShaper bounds the tool responses handed to the model
+from openapi_response_shaping import ResponseShaper
 
 # --- Load Environment Variables (If ADK tools need them, e.g., API keys) ---
 load_dotenv() # Create a .env file in the same directory if needed
@@ -55,6 +62,8 @@ openapi_spec_string = """
       "get": {
         "summary": "List all pets (Simulated)",
         "operationId": "listPets",
+        "x-adk-cache-ttl": 60,
+        "x-adk-response-fields": ["args", "url"],
         "description": "Simulates returning a list of pets. Uses httpbin's /get endpoint which echoes query parameters.",
         "parameters": [
           {
@@ -137,9 +146,22 @@ openapi_spec_string = """
 """
 
 # --- Create OpenAPIToolset ---
-petstore_toolset = OpenAPIToolset(
+# The spec is parsed once and cached by hash in cache_dir; later starts load the cache
+petstore_toolset = CompiledOpenAPIToolset(
     spec_str=openapi_spec_string,
     spec_str_type='json',
+    cache_dir=".openapi_cache",
+    # For large specs, set max_tools (e.g. 10) to declare only the operations
+    # most relevant to each user message instead of all of them
+    max_tools=None,
+    # Reuse connections to the API server across tool calls, cache GET
+    # responses as their Cache-Control / ETag headers (or x-adk-cache-ttl) allow,
+    # and keep only the x-adk-response-fields of responses, with arrays capped
+    connection_pool=ConnectionPool(
+        max_connections_per_host=10,
+        response_cache=ResponseCache(),
+        response_shaper=ResponseShaper(max_items=20),
+    ),
     # No authentication needed for httpbin.org
 )
 
@@ -215,6 +237,12 @@ async def run_openapi_example():
     # Trigger showPetById
     await call_openapi_agent_async("Get info for pet with ID 123.", runner_openapi)
 
+    # Connections were opened once and reused by the later calls
+    print(f"Connection pool stats: {petstore_toolset.pool_stats()}")
+    print(f"Response cache stats: {petstore_toolset.cache_stats()}")
+    # Closes the toolsets, and with them the connection pool
+    await runner_openapi.close()
+
 # --- Execute ---
 if __name__ == "__main__":
     print("Executing OpenAPI example...")
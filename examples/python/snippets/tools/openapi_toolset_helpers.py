@@ -0,0 +1,332 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers for large OpenAPI specs, used by openapi_tool.py.
+
+CompiledOpenAPIToolset is an OpenAPIToolset that parses its spec (resolving
+$refs and building the parsed operations) once, and caches the result on disk
+keyed by a hash of the spec and the ADK version. Later starts load the cache
+instead of parsing again. Operations are pickled one by one, so only the
+index is decoded up front.
+
+With `max_tools`, the toolset is lazy: operations are indexed (operationId,
+summary, description, tags, path) and each turn only the `max_tools` most
+relevant to the user's message, ranked with BM25, are turned into
+RestApiTools and declared to the model.
+
+With `connection_pool` (see openapi_http_pool.py), all the tools share one
+keep-alive HTTP client, closed by the toolset's close(). If the pool has a
+ResponseCache (see openapi_response_cache.py), GET operations are cached,
+and with a ResponseShaper (see openapi_response_shaping.py) JSON responses
+are projected and truncated before they reach the model.
+
+Precompile a spec ahead of deployment with:
+
+    python openapi_toolset_helpers.py spec.json --cache-dir .openapi_cache
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import pickle
+import re
+import tempfile
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from google.adk import version
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.openapi_tool.openapi_spec_parser.openapi_spec_parser import OpenApiSpecParser, ParsedOperation
+from google.adk.tools.openapi_tool.openapi_spec_parser.openapi_toolset import OpenAPIToolset
+from google.adk.tools.openapi_tool.openapi_spec_parser.rest_api_tool import RestApiTool
+
+from openapi_http_pool import ConnectionPool
+from openapi_response_cache import CachingRestApiTool
+from openapi_response_shaping import ShapingRestApiTool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv("OPENAPI_CACHE_DIR", ".openapi_cache")
+
+# Bump when the cached layout changes
+CACHE_FORMAT = 1
+
+
+# --- Compiled Specs ---
+class CompiledSpec:
+    """Parsed operations of a spec, each unpickled on first use."""
+
+    def __init__(self, index: List[Dict[str, Any]], blobs: Dict[str, bytes]):
+        # One entry per operation: name, method, path, summary, description, tags
+        self.index = index
+        self._blobs = blobs
+        self._operations: Dict[str, ParsedOperation] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._blobs
+
+    def operation(self, name: str) -> ParsedOperation:
+        if name not in self._operations:
+            self._operations[name] = pickle.loads(self._blobs[name])
+        return self._operations[name]
+
+    def operations(self) -> List[ParsedOperation]:
+        return [self.operation(entry["name"]) for entry in self.index]
+
+
+def spec_hash(spec_dict: Dict[str, Any], preserve_property_names: bool = False) -> str:
+    """Hash of the spec content and of everything that shapes the parsed result."""
+    material = json.dumps(
+        [CACHE_FORMAT, version.__version__, preserve_property_names, spec_dict], sort_keys=True, default=str
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def compile_spec(spec_dict: Dict[str, Any], preserve_property_names: bool = False) -> CompiledSpec:
+    """Parses a spec into its operations, resolving all $refs."""
+    index, blobs = [], {}
+    parser = OpenApiSpecParser(preserve_property_names=preserve_property_names)
+    for operation in parser.parse(spec_dict):
+        index.append({
+            "name": operation.name,
+            "method": operation.endpoint.method,
+            "path": operation.endpoint.path,
+            "summary": operation.operation.summary or "",
+            "description": operation.description or "",
+            "tags": list(operation.operation.tags or []),
+        })
+        blobs[operation.name] = pickle.dumps(operation, protocol=pickle.HIGHEST_PROTOCOL)
+    return CompiledSpec(index, blobs)
+
+
+def load_compiled_spec(
+    spec_dict: Dict[str, Any],
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    preserve_property_names: bool = False,
+) -> CompiledSpec:
+    """
+    Returns the compiled spec from `cache_dir`, compiling and caching it on a miss.
+    The cache directory must only be writable by trusted users: it holds pickles.
+    """
+    if not cache_dir:
+        return compile_spec(spec_dict, preserve_property_names)
+
+    path = os.path.join(cache_dir, f"{spec_hash(spec_dict, preserve_property_names)}.pickle")
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+        return CompiledSpec(cached["index"], cached["blobs"])
+    except FileNotFoundError:
+        pass
+    except Exception:
+        logger.warning(f"Ignoring unreadable OpenAPI cache {path}", exc_info=True)
+
+    compiled = compile_spec(spec_dict, preserve_property_names)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write atomically so concurrent starts never read a partial file
+        with tempfile.NamedTemporaryFile("wb", dir=cache_dir, delete=False) as f:
+            tmp_path = f.name
+            pickle.dump({"index": compiled.index, "blobs": compiled._blobs}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        tmp_path = None
+        logger.info(f"Compiled {len(compiled.index)} OpenAPI operations into {path}")
+    except (OSError, pickle.PicklingError):
+        # The cache only saves parsing time: run without it
+        logger.warning(f"Could not write OpenAPI cache {path}", exc_info=True)
+    finally:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    return compiled
+
+
+# --- Relevance Ranking ---
+def tokenize(text: str) -> List[str]:
+    """Lowercase words, with camelCase and snake_case split and a trailing plural 's' dropped."""
+    words = re.findall(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+", text)
+    return [word[:-1] if len(word) > 3 and word.endswith("s") else word for word in map(str.lower, words)]
+
+
+class Bm25Index:
+    """Okapi BM25 over a fixed list of documents."""
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.term_counts = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = sum(self.lengths) / max(len(documents), 1)
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        self.idf = {
+            term: math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def top(self, query: List[str], k: int) -> List[int]:
+        """Indexes of the (at most k) best-matching documents with a positive score."""
+        scores = []
+        for position, counts in enumerate(self.term_counts):
+            score = 0.0
+            normalized_length = self.k1 * (1 - self.b + self.b * self.lengths[position] / self.average_length)
+            for term in set(query):
+                frequency = counts.get(term)
+                if frequency:
+                    score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + normalized_length)
+            if score > 0:
+                scores.append((score, position))
+        return [position for _, position in sorted(scores, key=lambda item: (-item[0], item[1]))[:k]]
+
+
+# --- Toolset ---
+class CompiledOpenAPIToolset(OpenAPIToolset):
+    """
+    OpenAPIToolset that loads its parsed operations from the on-disk cache
+    (see load_compiled_spec). Takes the OpenAPIToolset arguments, plus
+    `cache_dir` (None disables the cache), `max_tools` (None declares
+    every operation; a number enables lazy, relevance-filtered tools) and
+    `connection_pool` (a ConnectionPool owned and closed by the toolset).
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        max_tools: Optional[int] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        **kwargs,
+    ):
+        if connection_pool:
+            if kwargs.get("httpx_client_factory"):
+                raise ValueError("Pass either connection_pool or httpx_client_factory, not both")
+            kwargs["httpx_client_factory"] = connection_pool.client_factory
+        self.connection_pool = connection_pool
+        self._cache_dir = cache_dir
+        self._max_tools = max_tools
+        # Lazily created tools need the credential key OpenAPIToolset applies to eager ones
+        self._credential_key = kwargs.get("credential_key")
+        self._materialized: Dict[str, RestApiTool] = {}
+        self._bm25: Optional[Bm25Index] = None
+        self.compiled_spec: Optional[CompiledSpec] = None
+        super().__init__(**kwargs)
+
+    def _parse(self, openapi_spec_dict: Dict[str, Any]) -> List[RestApiTool]:
+        # Called by OpenAPIToolset.__init__ in place of parsing the spec
+        self.compiled_spec = load_compiled_spec(openapi_spec_dict, self._cache_dir, self._preserve_property_names)
+        if self._max_tools is not None:
+            self._bm25 = Bm25Index([
+                tokenize(" ".join([entry["name"], entry["summary"], entry["description"], entry["path"], *entry["tags"]]))
+                for entry in self.compiled_spec.index
+            ])
+            return []
+        return [self._materialize(operation) for operation in self.compiled_spec.operations()]
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[RestApiTool]:
+        if self._bm25 is None:
+            return await super().get_tools(readonly_context)
+
+        # Rank against the user's message of the current invocation
+        query = ""
+        user_content = readonly_context and readonly_context.user_content
+        if user_content and user_content.parts:
+            query = " ".join(part.text for part in user_content.parts if part.text)
+        names = [self.compiled_spec.index[position]["name"] for position in self._bm25.top(tokenize(query), self._max_tools)]
+        if not names:
+            # Nothing matched (e.g. an empty message or a follow-up like "yes"):
+            # keep the tools declared so far, or start with the first operations
+            names = list(self._materialized)[-self._max_tools:] if self._max_tools else []
+            names = names or [entry["name"] for entry in self.compiled_spec.index[:self._max_tools]]
+        tools = []
+        for name in names:
+            tool = self._lazy_tool(name)
+            if self._is_tool_selected(tool, readonly_context):
+                tools.append(tool)
+        return tools
+
+    def get_tool(self, tool_name: str) -> Optional[RestApiTool]:
+        if self._bm25 is None:
+            return super().get_tool(tool_name)
+        # Tools aren't created up front in lazy mode: create the named one
+        if tool_name not in self.compiled_spec:
+            return None
+        return self._lazy_tool(tool_name)
+
+    async def close(self) -> None:
+        if self.connection_pool:
+            await self.connection_pool.aclose()
+        await super().close()
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-origin connection counters of the pool, empty without one"""
+        return self.connection_pool.stats() if self.connection_pool else {}
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Counters of the pool's response cache, empty without one"""
+        cache = self.connection_pool and self.connection_pool.response_cache
+        return cache.stats() if cache else {}
+
+    def _lazy_tool(self, name: str) -> RestApiTool:
+        if name not in self._materialized:
+            self._materialized[name] = self._materialize(self.compiled_spec.operation(name))
+        return self._materialized[name]
+
+    def _materialize(self, operation: ParsedOperation) -> RestApiTool:
+        tool_class = RestApiTool
+        if self.connection_pool and self.connection_pool.response_shaper:
+            tool_class = ShapingRestApiTool
+        elif self.connection_pool and self.connection_pool.response_cache:
+            tool_class = CachingRestApiTool
+        tool = tool_class.from_parsed_operation(
+            operation,
+            ssl_verify=self._ssl_verify,
+            header_provider=self._header_provider,
+            httpx_client_factory=self._httpx_client_factory,
+        )
+        if self._bm25 is not None:
+            if self._auth_scheme:
+                tool.configure_auth_scheme(self._auth_scheme)
+            if self._auth_credential:
+                tool.configure_auth_credential(self._auth_credential)
+            if self._credential_key:
+                tool.configure_credential_key(self._credential_key)
+        return tool
+
+
+# --- Precompile ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompile an OpenAPI spec into the toolset cache.")
+    parser.add_argument("spec", help="Path to the OpenAPI spec (JSON or YAML)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument(
+        "--preserve-property-names",
+        action="store_true",
+        help="Compile for a toolset created with preserve_property_names=True",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.spec) as spec_file:
+        spec_text = spec_file.read()
+    if args.spec.endswith((".yaml", ".yml")):
+        import yaml
+        spec = yaml.safe_load(spec_text)
+    else:
+        spec = json.loads(spec_text)
+    compiled = load_compiled_spec(spec, args.cache_dir, args.preserve_property_names)
+    print(f"{len(compiled.index)} operations cached in {args.cache_dir}")